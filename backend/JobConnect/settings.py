@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/e
 """
 
+from os import getenv
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -181,3 +182,103 @@ JAZZMIN_SETTINGS = {
 # DIRECTORY containing the index.html file.
 
 FRONTED_DIR = "../frontend/dist/"
+
+# Directory for files the API workers of this deployment share at runtime
+
+RUNTIME_DIR = Path(getenv("JOBCONNECT_RUNTIME_DIR", BASE_DIR / ".run"))
+
+# API token cache. Cached users expire after TTL seconds and
+# the generation file marks invalidations across worker processes.
+
+TOKEN_CACHE_SIZE = 10_000
+
+TOKEN_CACHE_TTL = 300
+
+TOKEN_CACHE_GENERATION_FILE = RUNTIME_DIR / "token_cache.generation"
+
+# Public API response cache. Entries are fresh for TTL seconds and may
+# then be served for STALE more seconds while being refreshed. The
+# generation file tells other workers to drop their entries after writes.
+
+RESPONSE_CACHE_SIZE = 2048
+
+RESPONSE_CACHE_TTL = 30
+
+RESPONSE_CACHE_STALE = 60
+
+RESPONSE_CACHE_GENERATION_FILE = RUNTIME_DIR / "response_cache.generation"
+
+# Threads running blocking database work of async API routes, size to the
+# cores available since SQLite reads hold the GIL for most of their time.
+
+DB_EXECUTOR_WORKERS = int(getenv("DB_EXECUTOR_WORKERS", 8))
+
+# Processes hashing and verifying passwords off the request threads and
+# the most hashing jobs allowed to wait for them before logins get 503.
+
+PASSWORD_HASHING_WORKERS = 2
+
+PASSWORD_HASHING_QUEUE = 32
+
+# Rows fetched from the database per round trip when streaming job exports
+
+JOBS_EXPORT_CHUNK_SIZE = 2000
+
+# Square sizes in pixels that profile pictures can be requested in with
+# `?size=` on media URLs
+
+PROFILE_THUMBNAIL_SIZES = (64, 128, 256)
+
+# Variants of the shared images in MEDIA_ROOT / "default", which is tracked
+# by git, are written here instead of next to them
+
+THUMBNAIL_CACHE_DIR = RUNTIME_DIR / "thumbnails"
+
+# Directory where the OpenAPI document is cached per API version. Disabled
+# in debug mode where routes change without version bumps.
+
+OPENAPI_CACHE_DIR = None if DEBUG else RUNTIME_DIR / "openapi"
+
+# Seconds between reads of jobs written by other workers into the job
+# recommendations index
+
+RECOMMENDATIONS_SYNC_INTERVAL = 5
+
+# Rate limiting of API clients, turned off with RATE_LIMIT_ENABLED=false in
+# the environment e.g when load testing
+
+RATE_LIMIT_ENABLED = getenv("RATE_LIMIT_ENABLED", "true") == "true"
+
+# Token buckets of API clients as (method or "*", path prefix, tokens
+# refilled per second, bucket size). The first matching rule applies per
+# bearer token and, IP_FACTOR times larger, per client address.
+
+RATE_LIMITS = (
+    ("POST", "/api/v1/token", 0.2, 5),
+    ("PATCH", "/api/v1/token", 0.05, 2),
+    ("*", "/api/v1/jobs/export", 0.1, 3),
+    ("*", "/api/", 20, 60),
+)
+
+RATE_LIMIT_IP_FACTOR = 4
+
+# Most client buckets kept per worker
+
+RATE_LIMIT_BUCKETS = 100_000
+
+# Redis URL to share buckets between workers, requires the `redis` package.
+# Requests are let through while Redis cannot be reached
+
+RATE_LIMIT_REDIS_URL = None
+
+# Requests served at once before the API sheds load with 503. Zero turns
+# admission control off
+
+ADMISSION_MAX_IN_FLIGHT = int(getenv("ADMISSION_MAX_IN_FLIGHT", 64))
+
+# Clients served /api/metrics without a token. Other scrapers must send
+# `Authorization: Bearer <METRICS_TOKEN>`, unset leaves metrics local only
+
+METRICS_ALLOWED_HOSTS = ("127.0.0.1", "::1")
+
+METRICS_TOKEN = getenv("METRICS_TOKEN")
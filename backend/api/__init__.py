@@ -9,7 +9,9 @@ import os
 import time
 from pathlib import Path
 
-from fastapi import FastAPI, Request, Response
+import_started = time.perf_counter()
+
+from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -19,12 +21,19 @@ import django
 django.setup()
 
 from api.v1 import router as v1_router
+from api.metrics import MetricsMiddleware, metrics, router as metrics_router
+from api.openapi import cached_openapi
+from api.media import MediaFiles
+from api.frontend import FrontendFiles
+from api.v1.cache import ResponseCacheMiddleware
+from api.ratelimit import AdmissionMiddleware, RateLimitMiddleware
 from JobConnect.settings import (
     STATIC_URL,
     MEDIA_URL,
     STATIC_ROOT,
     MEDIA_ROOT,
     FRONTED_DIR,
+    OPENAPI_CACHE_DIR,
 )
 
 api_module_path = Path(__file__).parent
@@ -43,15 +52,13 @@ app = FastAPI(
     openapi_url="/api/openapi.json",
 )
 
+app.openapi = cached_openapi(app, OPENAPI_CACHE_DIR)
+
+app.add_middleware(AdmissionMiddleware)
 
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response: Response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+app.add_middleware(ResponseCacheMiddleware)
 
+app.add_middleware(RateLimitMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -61,19 +68,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 # Mount static & media files
 app.mount(STATIC_URL[:-1], StaticFiles(directory=STATIC_ROOT), name="static")
-app.mount(MEDIA_URL[:-1], StaticFiles(directory=MEDIA_ROOT), name="media")
+app.mount(MEDIA_URL[:-1], MediaFiles(directory=MEDIA_ROOT), name="media")
 
-from django.core.handlers.wsgi import WSGIHandler
+from django.core.handlers.asgi import ASGIHandler
 
-from fastapi.middleware.wsgi import WSGIMiddleware
-
-app.mount("/d", app=WSGIMiddleware(WSGIHandler()), name="django")
+app.mount("/d", app=ASGIHandler(), name="django")
 
 # Include API router
 app.include_router(v1_router, prefix=api_prefix)
+app.include_router(metrics_router, prefix=api_prefix)
 
 if FRONTED_DIR:
     # let's serve the frontend dir
-    app.mount("/", StaticFiles(directory=FRONTED_DIR, html=True))
+    app.mount("/", FrontendFiles(directory=FRONTED_DIR, html=True))
+
+metrics.import_seconds = time.perf_counter() - import_started
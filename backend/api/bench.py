@@ -0,0 +1,398 @@
+"""HTTP load testing harness for the API.
+
+Drives a weighted mix of v1 calls against a locally started server using
+concurrent async clients and reports latency percentiles, throughput and
+error rate per route. `serialization_bench` times response rendering alone.
+"""
+
+import os
+import sys
+import time
+import random
+import secrets
+import asyncio
+import statistics
+import subprocess
+import httpx
+from typing import Callable
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from django.contrib.auth.models import Permission
+from django.utils import timezone
+from api.fake_data import FakeJob, FakeUsers
+from api.v1.models import JobsAvailable, JobResponse
+from api.v1.responses import TrustedJSONResponse
+from api.v1.routes import router as v1_router
+from api.v1.utils import encode_cursor
+from jobs.models import Job, JobCategory
+from users.models import CustomUser
+
+default_mix = "list=40,detail=25,categories=15,token=5,apply=10,applicants=5"
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    """Parses `route=weight,...` into a mapping"""
+    weights = {}
+    for item in mix.split(","):
+        route, _, weight = item.partition("=")
+        route = route.strip()
+        if route not in routes:
+            raise ValueError(
+                f"Unknown route '{route}'. Choose from {', '.join(routes)}"
+            )
+        weights[route] = int(weight or 1)
+    return weights
+
+
+def seed_dataset(users: int, jobs: int, seed: int = None, workers: int = 1):
+    """Populates database with fake data"""
+    FakeUsers(seed=seed, workers=workers).users(users)
+    fake_job = FakeJob(seed=seed, workers=workers)
+    fake_job.category()
+    fake_job.job(jobs)
+    print()
+
+
+def create_bench_user(staff: bool = False) -> tuple[CustomUser, str]:
+    """Organization user the bench logs in as and its password, both random.
+    It owns a job to query applicants and is only staff, with view access to
+    jobs, when admin pages are loaded. Delete it once done"""
+    username = f"bench-{secrets.token_hex(4)}"
+    password = secrets.token_urlsafe(24)
+    user = CustomUser.objects.create(
+        username=username,
+        password=password,
+        email=f"{username}@localhost.domain",
+        category="Organization",
+        location="localhost",
+        is_staff=staff,
+    )
+    if staff:
+        user.user_permissions.add(
+            Permission.objects.get_by_natural_key("view_job", "jobs", "job")
+        )
+    Job.objects.create(
+        company=user,
+        category=JobCategory.objects.first(),
+        title="Bench job",
+        min_salary=1,
+        max_salary=2,
+        description="Job whose applicants are listed while benchmarking",
+    )
+    return user, password
+
+
+class Bench:
+    """Runs the load and collects latencies per route"""
+
+    def __init__(
+        self,
+        base_url: str,
+        weights: dict[str, int],
+        concurrency: int,
+        duration: float,
+        job_ids: list[int],
+        bench_job_id: int,
+        username: str,
+        password: str,
+    ):
+        self.base_url = base_url
+        self.weights = weights
+        self.concurrency = concurrency
+        self.duration = duration
+        self.job_ids = job_ids
+        self.bench_job_id = bench_job_id
+        self.username = username
+        self.password = password
+        self.token: str = None
+        self.latencies: dict[str, list[float]] = {route: [] for route in weights}
+        self.errors: dict[str, int] = {route: 0 for route in weights}
+
+    async def fetch_token(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.post(
+            "/api/v1/token",
+            data={
+                "username": self.username,
+                "password": self.password,
+                "grant_type": "password",
+            },
+        )
+
+    @property
+    def auth_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def client_loop(self, client: httpx.AsyncClient, deadline: float):
+        rand = random.Random()
+        names = list(self.weights)
+        weights = list(self.weights.values())
+        while time.perf_counter() < deadline:
+            route = rand.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await routes[route](self, client, rand)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            self.latencies[route].append(time.perf_counter() - start)
+            if failed:
+                self.errors[route] += 1
+
+    async def run(self) -> dict:
+        limits = httpx.Limits(max_connections=self.concurrency)
+        async with httpx.AsyncClient(
+            base_url=self.base_url, limits=limits, timeout=60
+        ) as client:
+            self.token = (await self.fetch_token(client)).json()["access_token"]
+            if "admin" in self.weights:
+                # Session cookie kept by the client authenticates admin requests
+                await login(self, client, None)
+            start = time.perf_counter()
+            deadline = start + self.duration
+            await asyncio.gather(
+                *(self.client_loop(client, deadline) for _ in range(self.concurrency))
+            )
+            elapsed = time.perf_counter() - start
+        return self.report(elapsed)
+
+    @staticmethod
+    def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+        requests = len(latencies)
+        summary = {
+            "requests": requests,
+            "errors": errors,
+            "error_rate": errors / requests if requests else 0.0,
+            "throughput": requests / elapsed,
+        }
+        if requests > 1:
+            percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+            summary.update(
+                p50_ms=percentiles[49] * 1000,
+                p95_ms=percentiles[94] * 1000,
+                p99_ms=percentiles[98] * 1000,
+            )
+        elif requests:
+            summary.update(
+                dict.fromkeys(("p50_ms", "p95_ms", "p99_ms"), latencies[0] * 1000)
+            )
+        return summary
+
+    def report(self, elapsed: float) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "duration": elapsed,
+            "mix": self.weights,
+            "routes": {
+                route: self.summarize(latencies, self.errors[route], elapsed)
+                for route, latencies in self.latencies.items()
+            },
+            "total": self.summarize(
+                [
+                    latency
+                    for latencies in self.latencies.values()
+                    for latency in latencies
+                ],
+                sum(self.errors.values()),
+                elapsed,
+            ),
+        }
+
+
+async def list_jobs(bench: Bench, client: httpx.AsyncClient, rand: random.Random):
+    return await client.get("/api/v1/jobs", params={"limit": 20})
+
+
+async def job_detail(bench: Bench, client: httpx.AsyncClient, rand: random.Random):
+    return await client.get(f"/api/v1/job/{rand.choice(bench.job_ids)}")
+
+
+async def categories(bench: Bench, client: httpx.AsyncClient, rand: random.Random):
+    return await client.get("/api/v1/categories")
+
+
+async def token(bench: Bench, client: httpx.AsyncClient, rand: random.Random):
+    return await bench.fetch_token(client)
+
+
+async def apply(bench: Bench, client: httpx.AsyncClient, rand: random.Random):
+    return await client.post(
+        f"/api/v1/user/apply/{rand.choice(bench.job_ids)}", headers=bench.auth_headers
+    )
+
+
+async def applicants(bench: Bench, client: httpx.AsyncClient, rand: random.Random):
+    return await client.get(
+        f"/api/v1/job/appliers/{bench.bench_job_id}", headers=bench.auth_headers
+    )
+
+
+async def login(bench: Bench, client: httpx.AsyncClient, rand: random.Random):
+    return await client.get("/d/user/login", params={"token": bench.token})
+
+
+async def admin(bench: Bench, client: httpx.AsyncClient, rand: random.Random):
+    return await client.get("/d/admin/jobs/job/")
+
+
+routes: dict[str, Callable] = {
+    "list": list_jobs,
+    "detail": job_detail,
+    "categories": categories,
+    "token": token,
+    "apply": apply,
+    "applicants": applicants,
+    "login": login,
+    "admin": admin,
+}
+
+
+def start_server(
+    host: str,
+    port: int,
+    workers: int = 1,
+    poll_interval: float = 0.2,
+    env: dict[str, str] = None,
+) -> subprocess.Popen:
+    """Starts the app under uvicorn, with `env` added to its environment, and
+    waits until it accepts requests"""
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "api:app",
+            "--host",
+            host,
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--no-access-log",
+            "--log-level",
+            "warning",
+        ],
+        env=dict(os.environ, **(env or {})),
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            httpx.get(f"http://{host}:{port}/api/openapi.json", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(poll_interval)
+    server.terminate()
+    raise RuntimeError("Server did not start in time")
+
+
+def run_bench(
+    weights: dict[str, int],
+    concurrency: int,
+    duration: float,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    workers: int = 1,
+    limits: bool = False,
+) -> dict:
+    """Starts server, runs the load against it and returns the report. The
+    single bench client would mostly measure rate limits and shed load, so
+    both are turned off in the server unless `limits` is set. Raises
+    `ValueError` when the database has nothing to query"""
+    job_ids = list(
+        Job.objects.filter(is_available=True)
+        .order_by("?")
+        .values_list("id", flat=True)[:10_000]
+    )
+    if not job_ids or not JobCategory.objects.exists():
+        raise ValueError(
+            "No job categories or available jobs to benchmark. Seed some with "
+            "`python -m api fake all` or the --jobs and --users options"
+        )
+    bench_user, password = create_bench_user(staff="admin" in weights)
+    try:
+        env = {}
+        if not limits:
+            env.update(RATE_LIMIT_ENABLED="false", ADMISSION_MAX_IN_FLIGHT="0")
+        server = start_server(host, port, workers, env=env)
+        try:
+            bench = Bench(
+                base_url=f"http://{host}:{port}",
+                weights=weights,
+                concurrency=concurrency,
+                duration=duration,
+                job_ids=job_ids,
+                bench_job_id=bench_user.jobs.values_list("id", flat=True).first(),
+                username=bench_user.username,
+                password=password,
+            )
+            return asyncio.run(bench.run())
+        finally:
+            server.terminate()
+            server.wait()
+    finally:
+        bench_user.delete()
+
+
+def serialization_bench(jobs: int = 100, number: int = 200) -> dict:
+    """Microseconds spent rendering a job listings page of `jobs` items
+    through FastAPI's response model validation and through
+    `TrustedJSONResponse`. Best of 5 rounds of `number` renders each"""
+    updated_at = timezone.now()
+    items = [
+        JobResponse.model_construct(
+            id=id,
+            company_id=1,
+            company_username="Tech Innovators Inc.",
+            category_id=1,
+            category_name="Software Engineering",
+            title="Senior Software Engineer",
+            type="Full-time",
+            min_salary=90000,
+            max_salary=120000,
+            updated_at=updated_at,
+        )
+        for id in range(jobs, 0, -1)
+    ]
+    page = JobsAvailable(
+        total=jobs, jobs=items, next=encode_cursor(updated_at, 1, "next")
+    )
+    route = next(
+        route
+        for route in v1_router.routes
+        if isinstance(route, APIRoute) and route.name == "Job listings"
+    )
+
+    async def validated() -> bytes:
+        content = await serialize_response(
+            field=route.response_field, response_content=page, is_coroutine=True
+        )
+        return JSONResponse(content).body
+
+    async def trusted() -> bytes:
+        return TrustedJSONResponse(page).body
+
+    async def best_of(render: Callable) -> float:
+        rounds = []
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(number):
+                await render()
+            rounds.append((time.perf_counter() - start) / number)
+        return min(rounds) * 1e6
+
+    async def measure() -> dict:
+        body = await trusted()
+        if await validated() != body:
+            raise RuntimeError("Renderers disagree on the response body")
+        validated_us = await best_of(validated)
+        trusted_us = await best_of(trusted)
+        return {
+            "jobs": jobs,
+            "body_bytes": len(body),
+            "validated_us": validated_us,
+            "trusted_us": trusted_us,
+            "speedup": validated_us / trusted_us,
+        }
+
+    return asyncio.run(measure())
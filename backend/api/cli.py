@@ -1,7 +1,24 @@
 from fastapi_cli.cli import app
+import os
+import json
 import typer
+from pathlib import Path
 from typing import Annotated
 from api.fake_data import FakeJob, FakeUsers
+from api.bench import (
+    parse_mix,
+    default_mix,
+    seed_dataset,
+    run_bench,
+    serialization_bench,
+)
+from api.frontend import compress_assets
+from api.startup import profile_imports, measure_boot
+from jobs.models import JobCategory
+from jobs import search
+from users.models import CustomUser
+from users.thumbnails import backfill_thumbnails
+from django.conf import settings
 
 jobconnect_app = typer.Typer(
     rich_markup_mode="rich", help="JobConnect utilities endpoint"
@@ -12,6 +29,16 @@ faker = typer.Typer(
     help="Populate database models with [bold yellow]FAKE[/bold yellow] data",
 )
 
+BatchSize = Annotated[
+    int, typer.Option(help="Rows inserted per database transaction", min=1)
+]
+Seed = Annotated[
+    int, typer.Option(help="Random seed for reproducible data. Random if not set")
+]
+Workers = Annotated[
+    int, typer.Option(help="Processes generating fake data in parallel", min=1)
+]
+
 
 @faker.command()
 def job_category(
@@ -20,12 +47,13 @@ def job_category(
         typer.Option(
             help="Fake job [bold green]categories[/bold green] amount to be generated",
         ),
-    ] = 50
+    ] = 50,
+    seed: Seed = None,
 ):
     """Generate fake job categories"""
-    fake_job = FakeJob()
-    fake_job.category(amount)
-    typer.secho(f"---{amount} job categories faked successfully---", fg="yellow")
+    fake_job = FakeJob(seed=seed)
+    created = fake_job.category(amount)
+    typer.secho(f"---{created} job categories faked successfully---", fg="yellow")
 
 
 @faker.command()
@@ -35,12 +63,15 @@ def jobs(
         typer.Option(
             help="Fake jobs amount to be generated",
         ),
-    ] = 50
+    ] = 50,
+    batch_size: BatchSize = 1000,
+    seed: Seed = None,
+    workers: Workers = os.cpu_count(),
 ):
     """Generate fake [bold green]jobs[/bold green]"""
-    fake_job = FakeJob()
-    fake_job.job(amount)
-    typer.secho(f"---{amount} jobs faked successfully---", fg="yellow")
+    fake_job = FakeJob(batch_size=batch_size, seed=seed, workers=workers)
+    created = fake_job.job(amount)
+    typer.secho(f"---{created} jobs faked successfully---", fg="yellow")
 
 
 @faker.command()
@@ -50,12 +81,15 @@ def users(
         typer.Option(
             help="Fake users amount to be generated",
         ),
-    ] = 100
+    ] = 100,
+    batch_size: BatchSize = 1000,
+    seed: Seed = None,
+    workers: Workers = os.cpu_count(),
 ):
     """Generate fake [bold green]users[/bold green]"""
-    fake_users = FakeUsers()
-    fake_users.users(amount)
-    typer.secho(f"---{amount} users faked successfully---", fg="yellow")
+    fake_users = FakeUsers(batch_size=batch_size, seed=seed, workers=workers)
+    created = fake_users.users(amount)
+    typer.secho(f"---{created} users faked successfully---", fg="yellow")
 
 
 @faker.command()
@@ -65,16 +99,170 @@ def all(
         typer.Option(
             help="Fake entries amount to be made per model",
         ),
-    ] = 20
+    ] = 20,
+    batch_size: BatchSize = 1000,
+    seed: Seed = None,
+    workers: Workers = os.cpu_count(),
 ):
     """Make entries into all db models with fake data"""
-    FakeUsers().users(amount)
-    typer.secho(f"---{amount} users faked successfully---", fg="yellow")
-    fake_job = FakeJob()
-    fake_job.category(amount)
-    typer.secho(f"---{amount} job categories faked successfully---", fg="yellow")
-    fake_job.job(amount)
-    typer.secho(f"---{amount} jobs faked successfully---", fg="yellow")
+    fake_users = FakeUsers(batch_size=batch_size, seed=seed, workers=workers)
+    created = fake_users.users(amount)
+    typer.secho(f"---{created} users faked successfully---", fg="yellow")
+    fake_job = FakeJob(batch_size=batch_size, seed=seed, workers=workers)
+    created = fake_job.category(amount)
+    typer.secho(f"---{created} job categories faked successfully---", fg="yellow")
+    created = fake_job.job(amount)
+    typer.secho(f"---{created} jobs faked successfully---", fg="yellow")
+
+
+@jobconnect_app.command()
+def rebuild_counters():
+    """Recount [bold green]jobs[/bold green] amount of every job category"""
+    updated = JobCategory.rebuild_jobs_amount()
+    typer.secho(f"---{updated} job categories recounted successfully---", fg="yellow")
+
+
+@jobconnect_app.command()
+def rebuild_search_index():
+    """Rebuild full-text search index of [bold green]jobs[/bold green]"""
+    indexed = search.rebuild_search_index()
+    typer.secho(f"---{indexed} jobs indexed successfully---", fg="yellow")
+
+
+@jobconnect_app.command()
+def make_thumbnails(
+    workers: Annotated[
+        int, typer.Option(help="Processes resizing images in parallel", min=1)
+    ] = os.cpu_count(),
+):
+    """Render missing resized variants of user [bold green]profile[/bold green] pictures"""
+    profiles = CustomUser.objects.values_list("profile", flat=True).distinct()
+    made = backfill_thumbnails(profiles, workers=workers)
+    typer.secho(f"---{made} thumbnails made successfully---", fg="yellow")
+
+
+@jobconnect_app.command()
+def recommend_jobs(
+    top_k: Annotated[
+        int, typer.Option(help="Jobs to recommend to each user", min=1)
+    ] = 20,
+    active_days: Annotated[
+        int, typer.Option(help="Include users who applied within these days", min=1)
+    ] = 30,
+    workers: Annotated[
+        int, typer.Option(help="Processes scoring users in parallel", min=1)
+    ] = os.cpu_count(),
+):
+    """Store top job recommendations of every recently active user"""
+    # NumPy is only loaded for this command
+    from jobs.recommendations import recommend_all
+
+    users = recommend_all(top_k, active_days=active_days, workers=workers)
+    typer.secho(f"---Recommendations of {users} users stored---", fg="yellow")
+
+
+@jobconnect_app.command()
+def compress_frontend(
+    directory: Annotated[
+        Path, typer.Option(help="Built frontend directory. Defaults to FRONTED_DIR")
+    ] = None,
+):
+    """Write [bold green]brotli[/bold green] and gzip copies of frontend assets"""
+    directory = directory or settings.FRONTED_DIR
+    if not directory:
+        raise typer.BadParameter("FRONTED_DIR is not set", param_hint="--directory")
+    written = compress_assets(directory)
+    typer.secho(f"---{written} compressed assets written successfully---", fg="yellow")
+
+
+@jobconnect_app.command()
+def startup_profile(
+    top: Annotated[int, typer.Option(help="Slowest imports to list", min=1)] = 20,
+    runs: Annotated[
+        int, typer.Option(help="Server launches to time. 0 skips timing", min=0)
+    ] = 3,
+    port: Annotated[int, typer.Option(help="Port to launch the server on")] = 8765,
+    output: Annotated[
+        Path, typer.Option(help="Save JSON report to this file instead of stdout")
+    ] = None,
+):
+    """Report import time of the app and worker boot-to-ready time as JSON"""
+    report = profile_imports("api", top=top)
+    if runs:
+        report.update(measure_boot(port=port, runs=runs))
+    report_json = json.dumps(report, indent=4)
+    if output:
+        output.write_text(report_json)
+        typer.secho(f"---Startup report saved to {output}---", fg="yellow")
+    else:
+        typer.echo(report_json)
+
+
+@jobconnect_app.command()
+def bench(
+    jobs: Annotated[
+        int, typer.Option(help="Fake jobs to seed before benchmarking", min=0)
+    ] = 0,
+    users: Annotated[
+        int, typer.Option(help="Fake users to seed before benchmarking", min=0)
+    ] = 0,
+    mix: Annotated[
+        str, typer.Option(help="Weighted routes to call e.g `list=3,detail=1`")
+    ] = None,
+    concurrency: Annotated[int, typer.Option(help="Concurrent clients", min=1)] = 50,
+    duration: Annotated[
+        float, typer.Option(help="Seconds to keep sending requests", min=1)
+    ] = 10,
+    host: Annotated[str, typer.Option(help="Interface to bind the server to")] = (
+        "127.0.0.1"
+    ),
+    port: Annotated[int, typer.Option(help="Port to bind the server to")] = 8765,
+    server_workers: Annotated[
+        int, typer.Option(help="Uvicorn worker processes", min=1)
+    ] = 1,
+    limits: Annotated[
+        bool, typer.Option(help="Keep rate limits and admission control on")
+    ] = False,
+    seed: Seed = None,
+    output: Annotated[
+        Path, typer.Option(help="Save JSON report to this file instead of stdout")
+    ] = None,
+):
+    """Load test the API and report latency per route as JSON"""
+    try:
+        weights = parse_mix(mix or default_mix)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--mix")
+    if jobs or users:
+        seed_dataset(users=users, jobs=jobs, seed=seed, workers=os.cpu_count())
+    try:
+        report = run_bench(
+            weights,
+            concurrency=concurrency,
+            duration=duration,
+            host=host,
+            port=port,
+            workers=server_workers,
+            limits=limits,
+        )
+    except ValueError as e:
+        typer.secho(str(e), fg="red", err=True)
+        raise typer.Exit(1)
+    report_json = json.dumps(report, indent=4)
+    if output:
+        output.write_text(report_json)
+        typer.secho(f"---Bench report saved to {output}---", fg="yellow")
+    else:
+        typer.echo(report_json)
+
+
+@jobconnect_app.command()
+def bench_serialization(
+    jobs: Annotated[int, typer.Option(help="Jobs in the rendered page", min=1)] = 100,
+    number: Annotated[int, typer.Option(help="Renders per timing round", min=1)] = 200,
+):
+    """Time rendering a job listings page with and without response validation"""
+    typer.echo(json.dumps(serialization_bench(jobs=jobs, number=number), indent=4))
 
 
 jobconnect_app.add_typer(faker)
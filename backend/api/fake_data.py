@@ -1,48 +1,133 @@
 from faker import Faker
 from users.models import CustomUser
 from jobs.models import Job, JobCategory
-from sqlalchemy.exc import IntegrityError
+from jobs.signals import bulk_saved
+from django.db import models, transaction
+from django.db.models import Max
+from django.contrib.auth.hashers import make_password
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from typing import Callable, Iterator
 import math
 import random
 
 fake = Faker()
 
 
+def generate_individuals(start: int, amount: int, seed: int) -> list[dict]:
+    """Field values for `amount` individual users"""
+    fake = Faker()
+    fake.seed_instance(seed)
+    return [
+        dict(
+            username=f"{fake.user_name()}{index}",
+            first_name=fake.first_name(),
+            email=f"{index}.{fake.email()}",
+            category="Individual",
+            location=fake.address()[:50],
+            phone_number=fake.phone_number()[:15],
+        )
+        for index in range(start, start + amount)
+    ]
+
+
+def generate_organizations(start: int, amount: int, seed: int) -> list[dict]:
+    """Field values for `amount` organization users"""
+    fake = Faker()
+    fake.seed_instance(seed)
+    users = []
+    for index in range(start, start + amount):
+        name = fake.company()
+        users.append(
+            dict(
+                username=f"{name}{index}",
+                first_name=name,
+                email=f"{index}.{fake.company_email()}",
+                category="Organization",
+                location=fake.address()[:50],
+                phone_number=fake.phone_number()[:15],
+            )
+        )
+    return users
+
+
+def generate_jobs(start: int, amount: int, seed: int) -> list[dict]:
+    """Field values for `amount` jobs except company and category"""
+    fake = Faker()
+    fake.seed_instance(seed)
+    rand = random.Random(seed)
+    return [
+        dict(
+            title=fake.sentence()[:100],
+            type=rand.choice(["Full-time", "Internship"]),
+            min_salary=rand.randint(20000, 70000),
+            max_salary=rand.randint(70001, 150000),
+            description=fake.paragraph(rand.randint(1, 4)),
+        )
+        for _ in range(amount)
+    ]
+
+
 class FakeUtil:
 
+    def __init__(self, batch_size: int = 1000, seed: int = None, workers: int = 1):
+        self.batch_size = batch_size
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.workers = workers
+        self.random = random.Random(self.seed)
+        fake.seed_instance(self.seed)
+
     def get_group_amount(self, amount: int) -> int:
         return math.ceil(amount / 2)
 
+    def generate(
+        self, generator: Callable[[int, int, int], list[dict]], amount: int
+    ) -> Iterator[list[dict]]:
+        """Yields batches of generated rows, in parallel processes if
+        more than one worker is set. At most two batches per worker are
+        generated ahead of the consumer so memory stays bounded."""
+        starts = range(0, amount, self.batch_size)
+        sizes = [min(self.batch_size, amount - start) for start in starts]
+        seeds = [self.seed + count for count in range(len(sizes))]
+        if self.workers > 1 and len(sizes) > 1:
+            with ProcessPoolExecutor(self.workers) as executor:
+                pending = deque()
+                for args in zip(starts, sizes, seeds):
+                    if len(pending) >= 2 * self.workers:
+                        yield pending.popleft().result()
+                    pending.append(executor.submit(generator, *args))
+                while pending:
+                    yield pending.popleft().result()
+        else:
+            yield from map(generator, starts, sizes, seeds)
+
+    @staticmethod
+    def insert_new(model: type[models.Model], objs: list[models.Model]) -> int:
+        """Inserts `objs` skipping the ones conflicting with existing rows
+        and returns how many were actually inserted"""
+        last_id = model.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+        model.objects.bulk_create(objs, ignore_conflicts=True)
+        return model.objects.filter(id__gt=last_id).count()
+
 
 class FakeUsers(FakeUtil):
     """Generate fake data for modelss in Users app"""
 
-    def users(self, amount=100):
+    def users(self, amount=100) -> int:
+        """Fake CustomUser and return how many were inserted"""
         group_amount = self.get_group_amount(amount)
-        for _ in range(group_amount):
-            CustomUser.objects.create(
-                password=fake.password(),
-                username=fake.user_name(),
-                first_name=fake.first_name(),
-                email=fake.email(),
-                category="Individual",
-                location=fake.address(),
-                phone_number=fake.phone_number(),
-            ).save()
-            print(f"> Users faked [{_+1}/{amount}]", end="\r")
-
-        for _ in range(group_amount):
-            name = fake.company()
-            CustomUser.objects.create(
-                password=fake.password(),
-                username=name,
-                first_name=name,
-                email=fake.company_email(),
-                category="Organization",
-                location=fake.address(),
-                phone_number=fake.phone_number(),
-            ).save()
-            print(f"> Users faked [{_+1+group_amount}/{amount}]", end="\r")
+        # Hashing is deliberately slow so all fake users share one password
+        password = make_password(fake.password())
+        created = 0
+        for generator in (generate_individuals, generate_organizations):
+            for batch in self.generate(generator, group_amount):
+                with transaction.atomic():
+                    created += self.insert_new(
+                        CustomUser,
+                        [CustomUser(password=password, **fields) for fields in batch],
+                    )
+                print(f"> Users faked [{created}/{amount}]", end="\r")
+        return created
 
 
 class FakeJob(FakeUtil):
@@ -99,33 +184,43 @@ class FakeJob(FakeUtil):
         "UX/UI Designer",
     ]
 
-    def category(self, amount=50):
-        """Fake JobCategory"""
-        for count, category in enumerate(self.job_categories, start=1):
-            try:
-                JobCategory.objects.create(
-                    name=category,
-                    description=fake.text(random.randint(60, 100)),
-                ).save()
-                print(f"> Categories faked [{count}/{amount}]", end="\r")
-                if count == amount:
-                    break
-            except IntegrityError:
-                pass
-
-    def job(self, amount=100):
-        """Fake Job"""
-        group_amount = self.get_group_amount(amount)
-        categories = JobCategory.objects.all()
-        companies = CustomUser.objects.filter(category="Organization").all()
-        for _ in range(group_amount):
-            Job.objects.create(
-                company=random.choice(companies),
-                category=random.choice(categories),
-                title=fake.sentence(),
-                type=random.choice(["Full-time", "Internship"]),
-                min_salary=random.randint(20000, 70000),
-                max_salary=random.randint(70001, 150000),
-                description=fake.paragraph(random.randint(1, 4)),
-            ).save()
-            print(f"> Jobs faked [{_+1}/{amount}]", end="\r")
+    def category(self, amount=50) -> int:
+        """Fake JobCategory and return how many were inserted"""
+        categories = [
+            JobCategory(
+                name=category,
+                description=fake.text(self.random.randint(60, 100)),
+            )
+            for category in self.job_categories[:amount]
+        ]
+        with transaction.atomic():
+            created = self.insert_new(JobCategory, categories)
+        print(f"> Categories faked [{created}/{amount}]", end="\r")
+        return created
+
+    def job(self, amount=100) -> int:
+        """Fake Job and return how many were inserted"""
+        category_ids = list(JobCategory.objects.values_list("id", flat=True))
+        company_ids = list(
+            CustomUser.objects.filter(category="Organization").values_list(
+                "id", flat=True
+            )
+        )
+        created = 0
+        for batch in self.generate(generate_jobs, amount):
+            jobs = [
+                Job(
+                    company_id=self.random.choice(company_ids),
+                    category_id=self.random.choice(category_ids),
+                    **fields,
+                )
+                for fields in batch
+            ]
+            with transaction.atomic():
+                jobs = Job.objects.bulk_create(jobs)
+                bulk_saved.send(
+                    sender=Job, created=jobs, updated=[], saved_category_ids={}
+                )
+            created += len(jobs)
+            print(f"> Jobs faked [{created}/{amount}]", end="\r")
+        return created
@@ -0,0 +1,159 @@
+"""Serves the built frontend with precompressed assets.
+
+`compress_assets` writes `.br` (when the `brotli` package is installed) and
+`.gz` siblings of text assets. `FrontendFiles` then sends the smallest
+encoding the client accepts. Vite fingerprinted assets such as
+`assets/index-4f3a9c1b.js` are cached for good while `index.html` is
+revalidated on every load.
+"""
+
+import os
+import re
+import gzip
+import uuid
+from pathlib import Path
+from mimetypes import guess_type
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+from starlette.types import Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+compressible_extensions = (
+    ".html",
+    ".js",
+    ".mjs",
+    ".css",
+    ".json",
+    ".map",
+    ".svg",
+    ".txt",
+    ".xml",
+    ".ico",
+    ".webmanifest",
+)
+
+# Smaller files gain nothing worth an extra file lookup
+compress_min_size = 1024
+
+# Vite builds `assets/<name>-<8 character base64url content hash>.<ext>`
+fingerprint_pattern = re.compile(r"/assets/[^/]+-[A-Za-z0-9_-]{8}\.[a-z0-9]+$")
+
+immutable_cache_control = "public, max-age=31536000, immutable"
+
+revalidate_cache_control = "no-cache"
+
+encodings = (("br", ".br"), ("gzip", ".gz"))
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_assets(directory: str | Path) -> int:
+    """Writes missing or outdated compressed siblings of assets in
+    `directory`. Returns number of files written"""
+    written = 0
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = Path(root) / filename
+            if path.suffix not in compressible_extensions:
+                continue
+            stat_result = path.stat()
+            if stat_result.st_size < compress_min_size:
+                continue
+            data = None
+            for encoding, suffix in encodings:
+                if encoding == "br" and brotli is None:
+                    continue
+                target = path.with_name(path.name + suffix)
+                if target.exists() and target.stat().st_mtime >= stat_result.st_mtime:
+                    continue
+                data = path.read_bytes() if data is None else data
+                compressed = compress(data, encoding)
+                if len(compressed) >= len(data):
+                    continue
+                partial = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+                partial.write_bytes(compressed)
+                os.replace(partial, target)
+                written += 1
+    return written
+
+
+class PathSendFileResponse(FileResponse):
+    """Hands whole file responses to the server through the ASGI
+    `http.response.pathsend` extension when available so that it can use
+    zero-copy `sendfile`"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            "http.response.pathsend" not in scope.get("extensions", {})
+            or self.stat_result is None
+            or scope["method"].upper() == "HEAD"
+            or "range" in Headers(scope=scope)
+        ):
+            await super().__call__(scope, receive, send)
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        await send({"type": "http.response.pathsend", "path": str(self.path)})
+
+
+class FrontendFiles(StaticFiles):
+    """`StaticFiles` sending precompressed siblings and caching fingerprinted
+    assets as immutable"""
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = request_headers.get("accept-encoding", "")
+        headers = {
+            "Cache-Control": (
+                immutable_cache_control
+                if fingerprint_pattern.search(str(full_path))
+                else revalidate_cache_control
+            ),
+        }
+        path = full_path
+        if Path(full_path).suffix in compressible_extensions:
+            headers["Vary"] = "Accept-Encoding"
+            for encoding, suffix in encodings:
+                if encoding not in accepted:
+                    continue
+                try:
+                    encoded_stat = os.stat(f"{full_path}{suffix}")
+                except OSError:
+                    continue
+                if encoded_stat.st_mtime < stat_result.st_mtime:
+                    # Left over from a previous build
+                    continue
+                path, stat_result = f"{full_path}{suffix}", encoded_stat
+                headers["Content-Encoding"] = encoding
+                break
+
+        response = PathSendFileResponse(
+            path,
+            status_code=status_code,
+            stat_result=stat_result,
+            headers=headers,
+            media_type=guess_type(full_path)[0] or "text/plain",
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,50 @@
+"""Media files mount serving resized profile pictures"""
+
+from urllib.parse import parse_qsl
+from django.conf import settings
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+from users.thumbnails import (
+    is_image,
+    make_thumbnail,
+    thumbnail_path,
+    thumbnail_media_types,
+)
+
+# Variant names derive from the uploaded file name which changes on upload
+immutable_cache_control = "public, max-age=31536000, immutable"
+
+
+class MediaFiles(StaticFiles):
+    """`StaticFiles` that answers `?size=<pixels>` on images with a variant
+    of that size, rendered on first request. WebP is sent to clients that
+    accept it and JPEG to the rest"""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        size = dict(parse_qsl(scope["query_string"].decode("latin-1"))).get("size")
+        if size is None:
+            return await super().get_response(path, scope)
+
+        if not size.isdigit() or int(size) not in settings.PROFILE_THUMBNAIL_SIZES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Size must be one of {settings.PROFILE_THUMBNAIL_SIZES}",
+            )
+        full_path, stat_result = await run_in_threadpool(self.lookup_path, path)
+        if stat_result is None or not is_image(full_path):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+        accept = Headers(scope=scope).get("accept", "")
+        format = "webp" if "image/webp" in accept else "jpeg"
+        target = thumbnail_path(full_path, int(size), format)
+        if not target.exists():
+            await run_in_threadpool(make_thumbnail, full_path, int(size), format)
+        return FileResponse(
+            target,
+            media_type=thumbnail_media_types[format],
+            headers={"Cache-Control": immutable_cache_control, "Vary": "Accept"},
+        )
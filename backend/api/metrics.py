@@ -0,0 +1,270 @@
+"""Request metrics exposed in the Prometheus text format"""
+
+import time
+import secrets
+from bisect import bisect_left
+from contextvars import ContextVar
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from api.v1.cache import token_cache, response_cache
+from api.v1 import utils
+from users.hashers import hashing_pool
+
+latency_buckets = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+# `[count, seconds]` of SQL queries run on behalf of the current request
+query_stats: ContextVar[list] = ContextVar("query_stats")
+
+# `(sql, params)` of SQL queries run in the current context, when set. The
+# context is copied into `run_sync` threads so their queries land here too
+query_log: ContextVar[list] = ContextVar("query_log")
+
+
+class RouteMetrics:
+    """Counters of a single `(method, route)` pair"""
+
+    __slots__ = ("statuses", "buckets", "duration", "queries", "query_duration")
+
+    def __init__(self):
+        self.statuses: dict[int, int] = {}
+        self.buckets = [0] * (len(latency_buckets) + 1)
+        self.duration = 0.0
+        self.queries = 0
+        self.query_duration = 0.0
+
+
+class Metrics:
+    """Per route request metrics.
+
+    Updates happen on the event loop thread only so no locking is needed.
+    """
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        self.in_flight = 0
+        self.import_seconds: float = None
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+        queries: list,
+    ):
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+        metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+        metrics.buckets[bisect_left(latency_buckets, duration)] += 1
+        metrics.duration += duration
+        metrics.queries += queries[0]
+        metrics.query_duration += queries[1]
+
+    def render(self) -> str:
+        lines = []
+
+        def family(name: str, type: str, help: str):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type}")
+
+        routes = sorted(self.routes.items())
+        family("http_requests_total", "counter", "Requests handled")
+        for (method, route), metrics in routes:
+            for status, count in sorted(metrics.statuses.items()):
+                lines.append(
+                    f'http_requests_total{{method="{method}",route="{route}",'
+                    f'status="{status}"}} {count}'
+                )
+
+        family("http_request_duration_seconds", "histogram", "Request latency")
+        for (method, route), metrics in routes:
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, count in zip(latency_buckets + ("+Inf",), metrics.buckets):
+                cumulative += count
+                lines.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(
+                f"http_request_duration_seconds_sum{{{labels}}} {metrics.duration}"
+            )
+            lines.append(
+                f"http_request_duration_seconds_count{{{labels}}} {cumulative}"
+            )
+
+        family("http_requests_in_flight", "gauge", "Requests being handled")
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+
+        family("db_queries_total", "counter", "SQL queries run per route")
+        for (method, route), metrics in routes:
+            lines.append(
+                f'db_queries_total{{method="{method}",route="{route}"}} '
+                f"{metrics.queries}"
+            )
+        family("db_query_duration_seconds_total", "counter", "Time spent in SQL")
+        for (method, route), metrics in routes:
+            lines.append(
+                f'db_query_duration_seconds_total{{method="{method}",route="{route}"}} '
+                f"{metrics.query_duration}"
+            )
+
+        if self.import_seconds is not None:
+            family("app_import_seconds", "gauge", "Time taken to import the app")
+            lines.append(f"app_import_seconds {self.import_seconds}")
+
+        # Reads go through `run_sync`, writes still made with the async ORM
+        # run on asgiref's own thread and are not counted here
+        family(
+            "db_executor_pending",
+            "gauge",
+            "Database calls made through run_sync that are queued or running",
+        )
+        lines.append(f"db_executor_pending {utils.db_executor_pending}")
+        family("password_hashing_pending", "gauge", "Password hashing jobs in progress")
+        lines.append(f"password_hashing_pending {hashing_pool.pending}")
+
+        caches = (("token", token_cache), ("response", response_cache))
+        family("cache_hits_total", "counter", "Cache lookups served from cache")
+        for name, cache in caches:
+            lines.append(f'cache_hits_total{{cache="{name}"}} {cache.hits}')
+        family("cache_misses_total", "counter", "Cache lookups that missed")
+        for name, cache in caches:
+            lines.append(f'cache_misses_total{{cache="{name}"}} {cache.misses}')
+        family("cache_hit_ratio", "gauge", "Share of cache lookups served")
+        for name, cache in caches:
+            lines.append(f'cache_hit_ratio{{cache="{name}"}} {cache.hit_ratio}')
+
+        lines.append("")
+        return "\n".join(lines)
+
+
+metrics = Metrics()
+
+
+def record_query(execute, sql, params, many, context):
+    log = query_log.get(None)
+    if log is not None and not many:
+        log.append((sql, params))
+    stats = query_stats.get(None)
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def track_queries(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsMiddleware:
+    """Records latency, status and SQL usage of each HTTP request.
+
+    Requests are labelled with the matched route path such as
+    `/api/v1/job/{id}`, or the mount path for static files. With
+    `query_headers` on (the default in debug mode), responses carry the
+    query count and time in milliseconds spent before they were sent in
+    `X-DB-Queries` and `X-DB-Time`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        metrics: Metrics = metrics,
+        query_headers: bool = settings.DEBUG,
+    ):
+        self.app = app
+        self.metrics = metrics
+        self.query_headers = query_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        queries = [0, 0.0]
+        token = query_stats.set(queries)
+        self.metrics.in_flight += 1
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.query_headers:
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", ())) + [
+                        (b"x-db-queries", str(queries[0]).encode()),
+                        (b"x-db-time", f"{queries[1] * 1000:.3f}".encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.in_flight -= 1
+            query_stats.reset(token)
+            route = scope.get("route")
+            self.metrics.observe(
+                scope["method"],
+                route.path if route is not None else scope.get("root_path") or "/",
+                status,
+                time.perf_counter() - start,
+                queries,
+            )
+
+
+def authorize_scraper(request: Request):
+    """Lets through local clients and scrapers sending `METRICS_TOKEN`"""
+    if request.client is not None and (
+        request.client.host in settings.METRICS_ALLOWED_HOSTS
+    ):
+        return
+    if settings.METRICS_TOKEN and secrets.compare_digest(
+        request.headers.get("authorization", "").encode(),
+        f"Bearer {settings.METRICS_TOKEN}".encode(),
+    ):
+        return
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Metrics are only served to internal scrapers.",
+    )
+
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    name="Metrics",
+    include_in_schema=False,
+    dependencies=[Depends(authorize_scraper)],
+)
+async def get_metrics() -> PlainTextResponse:
+    """Process metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
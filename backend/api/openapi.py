@@ -0,0 +1,44 @@
+"""OpenAPI document cached on disk per app version.
+
+Building the schema walks every route and pydantic model. Workers of the
+same release share the result through `openapi-<version>.json` instead of
+each building it on their first docs request.
+"""
+
+import os
+import json
+import uuid
+from pathlib import Path
+from typing import Callable
+from fastapi import FastAPI
+
+
+def cached_openapi(app: FastAPI, cache_dir: Path | None) -> Callable[[], dict]:
+    """Makes a replacement for `app.openapi` reading the schema from
+    `cache_dir` when present and writing it there otherwise. No caching
+    happens when `cache_dir` is None"""
+
+    def openapi() -> dict:
+        if app.openapi_schema is not None:
+            return app.openapi_schema
+        cache_file = None
+        if cache_dir is not None:
+            cache_file = Path(cache_dir) / f"openapi-{app.version}.json"
+            try:
+                app.openapi_schema = json.loads(cache_file.read_bytes())
+                return app.openapi_schema
+            except (OSError, ValueError):
+                pass
+        FastAPI.openapi(app)
+        if cache_file is not None:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                partial = cache_file.with_name(f".{cache_file.name}.{uuid.uuid4().hex}")
+                partial.write_text(json.dumps(app.openapi_schema))
+                os.replace(partial, cache_file)
+            except OSError:
+                # Read-only deployments keep building the schema per worker
+                pass
+        return app.openapi_schema
+
+    return openapi
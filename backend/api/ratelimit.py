@@ -0,0 +1,242 @@
+"""Rate limiting and admission control for the API.
+
+`RateLimitMiddleware` gives every client a token bucket per rule of
+`RATE_LIMITS` and answers `429` once it is empty. Clients are told apart
+by bearer token and by IP address. The IP bucket is `RATE_LIMIT_IP_FACTOR`
+times larger to leave room for users sharing an address, and it also stops
+one address from cycling through made up tokens.
+
+`AdmissionMiddleware` answers `503` once `ADMISSION_MAX_IN_FLIGHT`
+requests are already being served. Requests are shed right away instead of
+queueing for the single SQLite database.
+
+Buckets live in each worker unless `RATE_LIMIT_REDIS_URL` is set. In that
+case all workers share them through Redis, which needs the optional
+`redis` package. Rate limiting fails open: requests are let through while
+Redis cannot be reached and admission control still guards the database.
+"""
+
+import math
+import time
+import asyncio
+from collections import OrderedDict
+from typing import NamedTuple
+from django.conf import settings
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class RateLimit(NamedTuple):
+    method: str
+    path: str
+    rate: float
+    burst: int
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.method == "*" or self.method == method) and path.startswith(
+            self.path
+        )
+
+
+class LocalBuckets:
+    """Token buckets of this worker. The least recently used ones are
+    dropped past `maxsize`, which equals refilling them"""
+
+    # Failures of the store that let requests through
+    errors: tuple[type[Exception], ...] = ()
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Takes a token from the bucket. Returns 0 when one was available
+        or else the seconds until one will be"""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class RedisBuckets:
+    """Token buckets shared by all workers in Redis. Buckets expire once
+    they would have refilled"""
+
+    take_script = """
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+    local tokens = tonumber(bucket[1]) or burst
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + (now - updated_at) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+    return tostring(wait)
+    """
+
+    def __init__(
+        self, url: str, prefix: str = "jobconnect:ratelimit:", timeout: float = 0.1
+    ):
+        from redis.asyncio import Redis
+        from redis.exceptions import RedisError
+
+        self.errors = (RedisError, OSError, asyncio.TimeoutError)
+        self.prefix = prefix
+        self.redis = Redis.from_url(
+            url, socket_timeout=timeout, socket_connect_timeout=timeout
+        )
+        self._take = self.redis.register_script(self.take_script)
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        return float(await self._take(keys=[self.prefix + key], args=[rate, burst]))
+
+
+class RateLimiter:
+    """Applies the first rule matching a request to its client"""
+
+    def __init__(
+        self,
+        rules: list[RateLimit],
+        buckets: LocalBuckets | RedisBuckets,
+        ip_factor: float,
+        enabled: bool = True,
+    ):
+        self.rules = rules
+        self.buckets = buckets
+        self.ip_factor = ip_factor
+        self.enabled = enabled
+        self.limited = 0
+        self.failures = 0
+
+    def match(self, method: str, path: str) -> tuple[int, RateLimit] | None:
+        for index, rule in enumerate(self.rules):
+            if rule.matches(method, path):
+                return index, rule
+        return None
+
+    async def check(self, scope: Scope) -> float:
+        """Seconds the client has to wait before the request is allowed"""
+        if not self.enabled:
+            return 0.0
+        matched = self.match(scope["method"], scope["path"])
+        if matched is None:
+            return 0.0
+        index, rule = matched
+        client = scope.get("client")
+        authorization = Headers(scope=scope).get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        try:
+            wait = await self.buckets.take(
+                f"{index}:ip:{client[0] if client else ''}",
+                rule.rate * self.ip_factor,
+                math.ceil(rule.burst * self.ip_factor),
+            )
+            if not wait and scheme.lower() == "bearer" and token:
+                wait = await self.buckets.take(f"{index}:token:{token}", *rule[2:])
+        except self.buckets.errors:
+            self.failures += 1
+            return 0.0
+        if wait:
+            self.limited += 1
+        return wait
+
+
+def make_rate_limiter() -> RateLimiter:
+    if settings.RATE_LIMIT_REDIS_URL:
+        buckets = RedisBuckets(settings.RATE_LIMIT_REDIS_URL)
+    else:
+        buckets = LocalBuckets(maxsize=settings.RATE_LIMIT_BUCKETS)
+    return RateLimiter(
+        rules=[RateLimit(*rule) for rule in settings.RATE_LIMITS],
+        buckets=buckets,
+        ip_factor=settings.RATE_LIMIT_IP_FACTOR,
+        enabled=settings.RATE_LIMIT_ENABLED,
+    )
+
+
+rate_limiter = make_rate_limiter()
+
+
+async def send_refusal(send: Send, status: int, detail: str, retry_after: float):
+    body = b'{"detail":"' + detail.encode() + b'"}'
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """Answers `429` with `Retry-After` to clients out of tokens"""
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            wait = await self.limiter.check(scope)
+            if wait:
+                await send_refusal(send, 429, "Too many requests", wait)
+                return
+        await self.app(scope, receive, send)
+
+
+class AdmissionMiddleware:
+    """Answers `503` with `Retry-After` while `max_in_flight` requests to
+    paths starting with `prefixes` are being served. Zero disables it"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_in_flight: int = settings.ADMISSION_MAX_IN_FLIGHT,
+        prefixes: tuple[str, ...] = ("/api/", "/d/"),
+        exempt: tuple[str, ...] = ("/api/metrics",),
+    ):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.prefixes = prefixes
+        self.exempt = exempt
+        self.in_flight = 0
+        self.shed = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            not self.max_in_flight
+            or scope["type"] != "http"
+            or not scope["path"].startswith(self.prefixes)
+            or scope["path"].startswith(self.exempt)
+        ):
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.max_in_flight:
+            self.shed += 1
+            await send_refusal(send, 503, "Server is busy", 1)
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,74 @@
+"""Measures how long a worker takes to get ready.
+
+`profile_imports` runs `python -X importtime` on a module in a fresh
+interpreter and ranks the slowest imports. `measure_boot` times a server
+from launch until it answers its first request.
+"""
+
+import sys
+import time
+import subprocess
+from api.bench import start_server
+
+
+def parse_importtime(output: str) -> list[dict]:
+    """Parses `-X importtime` lines into `module`, `self_ms`, `cumulative_ms`
+    and nesting `depth` entries"""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            # Header line
+            continue
+        imports.append(
+            {
+                "module": name.strip(),
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            }
+        )
+    return imports
+
+
+def profile_imports(module: str = "api", top: int = 20) -> dict:
+    """Import time of `module` in a new interpreter with its slowest imports"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed\n{result.stderr}")
+    imports = parse_importtime(result.stderr)
+    target = next(entry for entry in reversed(imports) if entry["module"] == module)
+    return {
+        "module": module,
+        "import_ms": target["cumulative_ms"],
+        "interpreter_ms": elapsed * 1000,
+        "slowest_self": sorted(imports, key=lambda entry: -entry["self_ms"])[:top],
+        "slowest_cumulative": sorted(
+            (entry for entry in imports if entry["depth"] <= 1),
+            key=lambda entry: -entry["cumulative_ms"],
+        )[:top],
+    }
+
+
+def measure_boot(host: str = "127.0.0.1", port: int = 8765, runs: int = 3) -> dict:
+    """Seconds from launching uvicorn until the app serves its OpenAPI
+    document, over `runs` launches"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        server = start_server(host, port, poll_interval=0.01)
+        timings.append(time.perf_counter() - start)
+        server.terminate()
+        server.wait()
+    return {
+        "runs": timings,
+        "boot_to_ready_s": min(timings),
+    }
@@ -0,0 +1,44 @@
+import pytest
+from contextlib import contextmanager
+from api.metrics import metrics
+from api.v1.cache import response_cache
+from api.ratelimit import rate_limiter
+
+
+@pytest.fixture(autouse=True)
+def unlimited(monkeypatch: pytest.MonkeyPatch):
+    """Keeps the shared test client within rate limits"""
+    monkeypatch.setattr(rate_limiter, "enabled", False)
+
+
+@pytest.fixture
+def query_budget():
+    """Asserts that each request made within the block runs at most `budget`
+    SQL queries. Cached responses are dropped first so routes hit the database
+
+    ```
+    with query_budget(2):
+        client.get("/v1/jobs")
+    ```
+    """
+
+    @contextmanager
+    def within(budget: int):
+        requests: list[tuple[str, str, int]] = []
+        observe = metrics.observe
+
+        def record(method, route, status, duration, queries):
+            requests.append((method, route, queries[0]))
+            observe(method, route, status, duration, queries)
+
+        response_cache.clear()
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            monkeypatch.setattr(metrics, "observe", record)
+            yield requests
+        assert requests, "No requests were made"
+        for method, route, queries in requests:
+            assert (
+                queries <= budget
+            ), f"{method} {route} ran {queries} queries, budget is {budget}"
+
+    return within
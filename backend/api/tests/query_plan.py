@@ -0,0 +1,46 @@
+"""Query plan checks for database queries made by routes"""
+
+import re
+import inspect
+from typing import Callable
+from asgiref.sync import async_to_sync
+from django.db import connection
+from api.metrics import query_log
+
+slow_plan_pattern = re.compile(r"^SCAN \w+$|USE TEMP B-TREE")
+
+
+def explain_queries(func: Callable, *args, **kwargs) -> list[tuple[str, list[str]]]:
+    """Calls `func` and returns every SELECT it made with its query plan steps.
+
+    Queries are collected through `query_log`, so the ones routes run on
+    `db_executor` threads with `run_sync` are captured as well as those
+    made on the calling thread. Coroutine functions run through
+    `async_to_sync`.
+    """
+    if inspect.iscoroutinefunction(func):
+        func = async_to_sync(func)
+    queries = []
+    token = query_log.set(queries)
+    try:
+        func(*args, **kwargs)
+    finally:
+        query_log.reset(token)
+    explained = []
+    with connection.cursor() as cursor:
+        for sql, params in queries:
+            if not sql.startswith("SELECT"):
+                continue
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            explained.append((sql, [row[-1] for row in cursor.fetchall()]))
+    return explained
+
+
+def assert_indexed_queries(func: Callable, *args, **kwargs):
+    """Fails if `func` runs a query that scans a whole table or sorts
+    rows in a temporary B-tree instead of reading them off an index"""
+    plans = explain_queries(func, *args, **kwargs)
+    assert plans, "No queries were captured"
+    for sql, plan in plans:
+        slow_steps = [step for step in plan if slow_plan_pattern.search(step)]
+        assert not slow_steps, f"{slow_steps} in plan of query: {sql}"
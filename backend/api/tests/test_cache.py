@@ -0,0 +1,51 @@
+from pathlib import Path
+from api.v1.cache import CachedResponse, ResponseCache
+
+
+def make_cache(generation_file: Path) -> ResponseCache:
+    return ResponseCache(
+        maxsize=10, ttl=30, stale=60, generation_file=generation_file, check_interval=0
+    )
+
+
+def make_entry(*tags: str) -> CachedResponse:
+    return CachedResponse(
+        status=200,
+        headers=[],
+        body=b"{}",
+        etag=b'"etag"',
+        tags=tags,
+        route=None,
+        fresh_until=float("inf"),
+        stale_until=float("inf"),
+    )
+
+
+def test_blank_query_values_are_kept_apart():
+    assert ResponseCache.make_key("/v1/jobs", b"category_id=") != (
+        ResponseCache.make_key("/v1/jobs", b"")
+    )
+    assert ResponseCache.make_key("/v1/jobs", b"b=1&a=") == (
+        ResponseCache.make_key("/v1/jobs", b"a=&b=1")
+    )
+
+
+def test_render_survives_invalidation_of_other_tags(tmp_path: Path):
+    cache = make_cache(tmp_path / "generation")
+    generation = cache.generation
+    cache.invalidate("job:2")
+    cache.set("/v1/job/1", make_entry("job:1"), generation)
+    assert cache.get("/v1/job/1") is not None
+    generation = cache.generation
+    cache.invalidate("job:1")
+    cache.set("/v1/job/1", make_entry("job:1"), generation)
+    assert cache.get("/v1/job/1") is None
+
+
+def test_invalidation_reaches_other_workers(tmp_path: Path):
+    worker, other_worker = make_cache(tmp_path / "gen"), make_cache(tmp_path / "gen")
+    for cache in (worker, other_worker):
+        cache.set("/v1/jobs", make_entry("jobs"), cache.generation)
+    worker.invalidate("jobs")
+    assert worker.get("/v1/jobs") is None
+    assert other_worker.get("/v1/jobs") is None
@@ -0,0 +1,43 @@
+import gzip
+import pytest
+from pathlib import Path
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.frontend import FrontendFiles, compress_assets
+
+script = b"console.log('JobConnect');\n" * 100
+
+
+@pytest.fixture
+def frontend_client(tmp_path: Path) -> TestClient:
+    tmp_path.joinpath("assets").mkdir()
+    tmp_path.joinpath("assets", "index-AbCd12_4.js").write_bytes(script)
+    tmp_path.joinpath("index.html").write_text("<html></html>" * 100)
+    assert compress_assets(tmp_path) >= 2
+    app = FastAPI()
+    app.mount("/", FrontendFiles(directory=tmp_path, html=True))
+    return TestClient(app)
+
+
+def test_precompressed_fingerprinted_asset(frontend_client: TestClient):
+    resp = frontend_client.get(
+        "/assets/index-AbCd12_4.js", headers={"Accept-Encoding": "gzip"}
+    )
+    assert resp.is_success
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "immutable" in resp.headers["cache-control"]
+    assert resp.headers["content-type"].startswith("text/javascript")
+    assert int(resp.headers["content-length"]) == len(gzip.compress(script, mtime=0))
+    assert resp.content == script
+
+
+def test_index_revalidates(frontend_client: TestClient):
+    headers = {"Accept-Encoding": "identity"}
+    resp = frontend_client.get("/", headers=headers)
+    assert resp.is_success
+    assert "content-encoding" not in resp.headers
+    assert resp.headers["cache-control"] == "no-cache"
+    resp1 = frontend_client.get(
+        "/", headers=dict(headers, **{"If-None-Match": resp.headers["etag"]})
+    )
+    assert resp1.status_code == 304
@@ -0,0 +1,52 @@
+import io
+import pytest
+from uuid import uuid4
+from pathlib import Path
+from PIL import Image
+from django.conf import settings
+from . import client
+
+
+@pytest.fixture
+def profile_image():
+    original = Path(settings.MEDIA_ROOT) / "user_profile" / f"{uuid4()}.png"
+    original.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", (640, 480), "teal").save(original)
+    yield original
+    for path in original.parent.glob(f"{original.stem}.*"):
+        path.unlink()
+
+
+@pytest.mark.parametrize(
+    ["accept", "media_type"], [("image/webp,*/*", "image/webp"), ("*/*", "image/jpeg")]
+)
+def test_profile_thumbnail(profile_image: Path, accept: str, media_type: str):
+    resp = client.get(
+        f"http://testserver/media/user_profile/{profile_image.name}",
+        params={"size": 64},
+        headers={"Accept": accept},
+    )
+    assert resp.is_success
+    assert resp.headers["content-type"] == media_type
+    assert "immutable" in resp.headers["cache-control"]
+    assert max(Image.open(io.BytesIO(resp.content)).size) == 64
+
+
+def test_profile_thumbnail_invalid_size(profile_image: Path):
+    resp = client.get(
+        f"http://testserver/media/user_profile/{profile_image.name}",
+        params={"size": 65},
+    )
+    assert resp.status_code == 400
+
+
+def test_default_avatar_thumbnail_stays_out_of_media(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "THUMBNAIL_CACHE_DIR", tmp_path)
+    resp = client.get(
+        "http://testserver/media/default/user_avatar.png", params={"size": 128}
+    )
+    assert resp.is_success
+    assert list(tmp_path.glob("user_avatar.128.*"))
+    assert not list((Path(settings.MEDIA_ROOT) / "default").glob("user_avatar.*.*"))
@@ -0,0 +1,39 @@
+import anyio
+from . import client
+from api import v1_router
+from api.metrics import router as metrics_router
+from api.v1 import utils
+from django.conf import settings
+
+
+def test_metrics(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ALLOWED_HOSTS", ("testclient",))
+    client.get(v1_router.url_path_for("Job listings"))
+    resp = client.get(metrics_router.url_path_for("Metrics"))
+    assert resp.is_success
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/api/v1/jobs"' in resp.text
+    assert 'db_queries_total{method="GET",route="/api/v1/jobs"}' in resp.text
+    assert 'cache_hit_ratio{cache="response"}' in resp.text
+    assert "db_executor_pending 0" in resp.text
+
+
+def test_metrics_need_token_from_outside(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scraper")
+    url = metrics_router.url_path_for("Metrics")
+    assert client.get(url).status_code == 403
+    resp = client.get(url, headers={"Authorization": "Bearer wrong"})
+    assert resp.status_code == 403
+    resp = client.get(url, headers={"Authorization": "Bearer scraper"})
+    assert resp.is_success
+
+
+def test_db_executor_pending_counts_run_sync_calls():
+    seen = []
+
+    async def main():
+        await utils.run_sync(lambda: seen.append(utils.db_executor_pending))
+
+    anyio.run(main)
+    assert seen == [1]
+    assert utils.db_executor_pending == 0
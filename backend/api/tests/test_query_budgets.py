@@ -0,0 +1,144 @@
+import pytest
+from . import client
+from .test_v1 import auth_request_headers
+from api import v1_router
+from api.v1.models import NewJob
+from api.v1.cache import response_cache
+from jobs import search
+from jobs.models import Job, JobCategory
+
+
+@pytest.mark.parametrize(
+    ["route", "params", "budget"],
+    [
+        ("Job listings", {"limit": 100}, 2),
+        ("Job listings", {"limit": 100, "with_total": False}, 1),
+        ("Job listings", {"limit": 100, "category_id": 1, "type": "Internship"}, 2),
+        ("Category listings", {}, 1),
+        ("Search jobs", {"q": "engineer"}, 2),
+        ("Job facets", {}, 1),
+        ("Job facets", {"type": "Full-time", "category_id": 1}, 1),
+    ],
+)
+def test_public_route_query_budget(query_budget, route: str, params: dict, budget):
+    with query_budget(budget):
+        resp = client.get(v1_router.url_path_for(route), params=params)
+    assert resp.is_success
+
+
+def test_job_details_query_budget(query_budget):
+    job = Job.objects.first()
+    with query_budget(1):
+        resp = client.get(v1_router.url_path_for("Get job by ID", id=job.id))
+    assert resp.is_success
+
+
+def test_jobs_applied_query_budget(query_budget):
+    headers = auth_request_headers()
+    with query_budget(3):
+        resp = client.get(
+            v1_router.url_path_for("Get jobs applied"),
+            params={"limit": 100},
+            headers=headers,
+        )
+    assert resp.is_success
+
+
+def test_job_appliers_query_budget(query_budget):
+    headers = auth_request_headers()
+    resp = client.post(
+        v1_router.url_path_for("Add new job"),
+        json=NewJob.model_config["json_schema_extra"]["example"],
+        headers=headers,
+    )
+    assert resp.is_success
+    with query_budget(4):
+        resp1 = client.get(
+            v1_router.url_path_for(
+                "Get users who applied a specific job", id=resp.json()["id"]
+            ),
+            params={"limit": 100},
+            headers=headers,
+        )
+    assert resp1.is_success
+
+
+def test_apply_query_budget(query_budget):
+    headers = auth_request_headers()
+    job_ids = [
+        client.post(
+            v1_router.url_path_for("Add new job"),
+            json=NewJob.model_config["json_schema_extra"]["example"],
+            headers=headers,
+        ).json()["id"]
+        for _ in range(3)
+    ]
+    # A single insert without writing the user
+    with query_budget(1):
+        resp = client.post(
+            v1_router.url_path_for("Apply for a specific job", id=job_ids[0]),
+            headers=headers,
+        )
+        resp1 = client.post(
+            v1_router.url_path_for("Apply for many jobs"),
+            json={"job_ids": job_ids[1:]},
+            headers=headers,
+        )
+        resp2 = client.delete(
+            v1_router.url_path_for("Unapply a speficic job", id=job_ids[0]),
+            headers=headers,
+        )
+    assert resp.is_success and resp1.is_success and resp2.is_success
+
+
+def test_bulk_delete_query_budget(query_budget):
+    headers = auth_request_headers()
+    new_job = NewJob.model_config["json_schema_extra"]["example"]
+    resp = client.post(
+        v1_router.url_path_for("Bulk job operations"),
+        json={
+            "operations": [
+                {"action": "create", "job": dict(new_job, category_id=category_id)}
+                for category_id in (1, 2) * 5
+            ]
+        },
+        headers=headers,
+    )
+    job_ids = [result["id"] for result in resp.json()["results"]]
+    amounts = dict(JobCategory.objects.values_list("id", "jobs_amount"))
+    # Statements stay the same however many jobs and categories are deleted
+    with query_budget(8):
+        resp1 = client.post(
+            v1_router.url_path_for("Bulk job operations"),
+            json={"operations": [{"action": "delete", "id": id} for id in job_ids]},
+            headers=headers,
+        )
+    assert all(result["success"] for result in resp1.json()["results"])
+    assert not Job.objects.filter(id__in=job_ids).exists()
+    assert dict(JobCategory.objects.values_list("id", "jobs_amount")) == {
+        **amounts,
+        1: amounts[1] - 5,
+        2: amounts[2] - 5,
+    }
+    assert not set(job_ids) & set(search.search_job_ids(new_job["title"], 1000))
+
+
+def test_recommended_jobs_query_budget(query_budget):
+    from jobs.recommendations import job_index
+
+    headers = auth_request_headers()
+    job_index.load()
+    with query_budget(4):
+        resp = client.get(
+            v1_router.url_path_for("Get recommended jobs"),
+            params={"limit": 100},
+            headers=headers,
+        )
+    assert resp.is_success
+
+
+def test_query_headers():
+    response_cache.clear()
+    resp = client.get(v1_router.url_path_for("Category listings"), params={"limit": 3})
+    assert int(resp.headers["X-DB-Queries"]) == 1
+    assert float(resp.headers["X-DB-Time"]) > 0
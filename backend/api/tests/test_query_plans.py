@@ -0,0 +1,54 @@
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from api.v1.routes import (
+    get_jobs_available,
+    get_categories_available,
+    get_job_appliers,
+)
+from jobs.models import Job
+from .query_plan import assert_indexed_queries
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"type": "Internship"},
+        {"category_id": 1},
+        {"category_id": 1, "type": "Full-time"},
+        {"user_id": 1},
+        {"offset": 40},
+        {"with_total": False},
+    ],
+)
+def test_job_listings_use_indexes(filters: dict):
+    assert_indexed_queries(get_jobs_available, **filters)
+
+
+@pytest.mark.parametrize("direction", ["next", "prev"])
+def test_job_listings_cursor_uses_indexes(direction: str):
+    response = async_to_sync(get_jobs_available)(limit=2, with_total=False)
+    response = async_to_sync(get_jobs_available)(
+        limit=2, cursor=json.loads(response.body)["next"], with_total=False
+    )
+    cursor = json.loads(response.body)[direction]
+    if cursor is None:
+        pytest.skip("Not enough jobs to paginate")
+    assert_indexed_queries(get_jobs_available, limit=2, cursor=cursor)
+
+
+def test_category_listings_use_indexes():
+    assert_indexed_queries(get_categories_available)
+
+
+def test_job_appliers_use_indexes():
+    job = Job.objects.select_related("company").first()
+    page = async_to_sync(get_job_appliers)(
+        id=job.id, user=job.company, limit=1, with_total=False
+    )
+    assert_indexed_queries(get_job_appliers, id=job.id, user=job.company, limit=1)
+    if page.next is not None:
+        assert_indexed_queries(
+            get_job_appliers, id=job.id, user=job.company, cursor=page.next
+        )
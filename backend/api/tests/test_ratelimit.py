@@ -0,0 +1,140 @@
+import anyio
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.ratelimit import (
+    AdmissionMiddleware,
+    LocalBuckets,
+    RateLimit,
+    RateLimiter,
+    RateLimitMiddleware,
+)
+
+
+class UnreachableBuckets:
+    errors = (ConnectionError,)
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        raise ConnectionError("Connection refused")
+
+
+def make_limiter(ip_factor: float = 2, buckets=None, enabled: bool = True):
+    return RateLimiter(
+        rules=[
+            RateLimit("POST", "/api/token", 0.01, 1),
+            RateLimit("*", "/api/", 0.01, 2),
+        ],
+        buckets=buckets or LocalBuckets(maxsize=100),
+        ip_factor=ip_factor,
+        enabled=enabled,
+    )
+
+
+def limited_client(limiter: RateLimiter) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/api/hello")
+    def hello():
+        return "Hello"
+
+    @app.post("/api/token")
+    def token():
+        return "Token"
+
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return TestClient(app)
+
+
+def test_rate_limit_per_route():
+    client = limited_client(make_limiter(ip_factor=1))
+    assert client.post("/api/token").is_success
+    resp = client.post("/api/token")
+    assert resp.status_code == 429
+    assert int(resp.headers["retry-after"]) > 1
+    assert resp.json() == {"detail": "Too many requests"}
+    # Other routes have their own buckets
+    assert client.get("/api/hello").is_success
+
+
+def test_rate_limit_per_token():
+    client = limited_client(make_limiter(ip_factor=2))
+    first = {"Authorization": "Bearer first"}
+    assert client.get("/api/hello", headers=first).is_success
+    assert client.get("/api/hello", headers=first).is_success
+    assert client.get("/api/hello", headers=first).status_code == 429
+    second = {"Authorization": "Bearer second"}
+    assert client.get("/api/hello", headers=second).is_success
+    # The address has used up its bucket, twice the size of a token's
+    assert client.get("/api/hello", headers=second).status_code == 429
+
+
+def test_rate_limit_disabled():
+    client = limited_client(make_limiter(ip_factor=1, enabled=False))
+    assert all(client.post("/api/token").is_success for _ in range(3))
+
+
+def test_rate_limit_fails_open():
+    limiter = make_limiter(buckets=UnreachableBuckets())
+    client = limited_client(limiter)
+    assert all(client.post("/api/token").is_success for _ in range(3))
+    assert limiter.failures == 3 and limiter.limited == 0
+
+
+def test_local_buckets_refill():
+    buckets = LocalBuckets(maxsize=1)
+
+    async def take():
+        return [await buckets.take("key", rate=1000, burst=1) for _ in range(2)]
+
+    assert anyio.run(take) == [0, pytest.approx(0.001, abs=1e-4)]
+    anyio.run(anyio.sleep, 0.002)
+    assert anyio.run(buckets.take, "key", 1000, 1) == 0
+    anyio.run(buckets.take, "other", 1000, 1)
+    assert list(buckets._buckets) == ["other"]
+
+
+def test_admission_sheds_load():
+    app = FastAPI()
+    release = anyio.Event()
+
+    @app.get("/api/slow")
+    async def slow():
+        await release.wait()
+        return "Done"
+
+    @app.get("/api/fast")
+    async def fast():
+        return "Done"
+
+    app.add_middleware(AdmissionMiddleware, max_in_flight=1)
+    statuses = []
+
+    async def request(path: str):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            resp = await client.get(path)
+            statuses.append((path, resp.status_code, resp.headers.get("retry-after")))
+
+    async def main():
+        async with anyio.create_task_group() as group:
+            group.start_soon(request, "/api/slow")
+            await anyio.sleep(0.05)
+            await request("/api/fast")
+            release.set()
+
+    anyio.run(main)
+    assert statuses == [("/api/fast", 503, "1"), ("/api/slow", 200, None)]
+
+
+def test_admission_disabled():
+    app = FastAPI()
+
+    @app.get("/api/hello")
+    def hello():
+        return "Hello"
+
+    app.add_middleware(AdmissionMiddleware, max_in_flight=0)
+    assert TestClient(app).get("/api/hello").is_success
@@ -0,0 +1,67 @@
+from jobs.models import Job
+from jobs.recommendations import JobIndex
+
+
+def make_job(id: int, category_id: int, title: str, salary: int, **fields) -> Job:
+    return Job(
+        id=id,
+        category_id=category_id,
+        title=title,
+        type=fields.get("type", "Full-time"),
+        min_salary=salary,
+        max_salary=salary,
+        description=fields.get("description", title),
+        is_available=fields.get("is_available", True),
+    )
+
+
+def job_features(job: Job) -> tuple:
+    return (
+        job.id,
+        job.category_id,
+        job.type,
+        job.min_salary,
+        job.max_salary,
+        job.title,
+        job.description,
+    )
+
+
+def make_index(jobs: list[Job]) -> JobIndex:
+    index = JobIndex(sync_interval=60, capacity=2)
+    index.loaded = True
+    index.update(jobs)
+    return index
+
+
+def test_rank_prefers_similar_jobs():
+    jobs = [
+        make_job(1, 1, "Python backend developer", 100_000),
+        make_job(2, 1, "Senior Python developer", 110_000),
+        make_job(3, 2, "Registered nurse", 40_000, type="Internship"),
+        make_job(4, 1, "Backend developer", 30_000),
+    ]
+    index = make_index(jobs)
+    ranked = index.rank([job_features(jobs[0])], count=10, exclude=[1])
+    assert [id for id, _ in ranked] == [2, 4, 3]
+    assert ranked[0][1] > ranked[1][1] > ranked[2][1]
+
+
+def test_removed_jobs_are_not_ranked():
+    jobs = [make_job(id, 1, "Data analyst", 50_000) for id in range(1, 6)]
+    index = make_index(jobs)
+    index.update([make_job(2, 1, "Data analyst", 50_000, is_available=False)])
+    index.discard([3])
+    assert len(index) == 3
+    ranked = index.rank([job_features(jobs[0])], count=10)
+    assert sorted(id for id, _ in ranked) == [1, 4, 5]
+
+    # Freed rows are reused before the arrays grow
+    index.update([make_job(6, 1, "Data analyst", 50_000)])
+    assert index.size == 5
+    assert 6 in [id for id, _ in index.rank([job_features(jobs[0])], count=10)]
+
+
+def test_rank_without_history():
+    index = make_index([make_job(1, 1, "Data analyst", 50_000)])
+    assert index.rank([], count=10) == []
@@ -0,0 +1,46 @@
+import json
+import pytest
+from datetime import datetime, timezone
+from api.bench import default_mix, parse_mix, run_bench, serialization_bench
+from django.db import transaction
+from jobs.models import Job
+from users.models import CustomUser
+from api.v1.models import JobDetails, JobResponse
+from api.v1.responses import TrustedJSONResponse
+
+
+def test_trusted_response_matches_pydantic():
+    details = JobDetails(
+        details=JobResponse.model_construct(
+            id=1,
+            company_id=1,
+            company_username="developer",
+            category_id=1,
+            category_name="Software Engineer",
+            title="Senior Software Engineer",
+            type="Full-time",
+            min_salary=90000,
+            max_salary=120000,
+            updated_at=datetime(2023, 10, 1, 12, 0, 0, 1, tzinfo=timezone.utc),
+        ),
+        description="Ship things",
+    )
+    body = TrustedJSONResponse(details).body
+    assert body == details.model_dump_json().encode()
+    assert json.loads(body)["details"]["updated_at"] == "2023-10-01T12:00:00.000001Z"
+
+
+def test_serialization_bench():
+    report = serialization_bench(jobs=3, number=2)
+    assert report["jobs"] == 3
+    assert report["validated_us"] > 0 and report["trusted_us"] > 0
+
+
+def test_bench_without_jobs():
+    users = CustomUser.objects.count()
+    with transaction.atomic():
+        Job.objects.update(is_available=False)
+        with pytest.raises(ValueError, match="fake all"):
+            run_bench(parse_mix(default_mix), concurrency=1, duration=1)
+        transaction.set_rollback(True)
+    assert CustomUser.objects.count() == users
@@ -0,0 +1,37 @@
+from pathlib import Path
+from fastapi import FastAPI
+from api.openapi import cached_openapi
+from api.startup import parse_importtime
+
+
+def test_cached_openapi(tmp_path: Path):
+    app = FastAPI(version="1.2.3")
+
+    @app.get("/ping")
+    async def ping():
+        return "pong"
+
+    app.openapi = cached_openapi(app, tmp_path)
+    schema = app.openapi()
+    assert "/ping" in schema["paths"]
+    assert tmp_path.joinpath("openapi-1.2.3.json").exists()
+
+    # Workers of the same version read the document instead of building it
+    other_app = FastAPI(version="1.2.3")
+    other_app.openapi = cached_openapi(other_app, tmp_path)
+    assert other_app.openapi() == schema
+
+
+def test_parse_importtime():
+    imports = parse_importtime(
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       300 |        300 |   json.decoder\n"
+        "import time:      1200 |       1500 | json\n"
+    )
+    assert imports[1] == {
+        "module": "json",
+        "self_ms": 1.2,
+        "cumulative_ms": 1.5,
+        "depth": 0,
+    }
+    assert imports[0]["depth"] == 1
@@ -1,7 +1,25 @@
+import os
+import json
+import anyio
 import pytest
+from uuid import uuid4
 from . import client
 from api import v1_router
 from api.v1.models import NewJob, UpdateJob
+from api.v1.utils import export_jobs, filter_jobs_available, run_sync
+from api.fake_data import FakeJob
+from django.conf import settings
+from django.apps import apps
+from django.contrib import admin
+from django.db.models import Count, F
+from django.db import connection
+from jobs import search, signals
+from jobs.models import Job, JobCategory
+from users.models import CustomUser
+from api.v1.cache import token_cache
+from concurrent.futures.process import BrokenProcessPool
+from django.contrib.auth.hashers import check_password, make_password
+from users.hashers import hashing_pool
 
 request_headers = {"Content-Type": "application/json", "Authorization": "Bearer None"}
 
@@ -20,16 +38,184 @@ def auth_request_headers() -> dict:
     return request_headers
 
 
+def test_fetch_token_when_hashing_pool_is_full(monkeypatch):
+    monkeypatch.setattr(hashing_pool, "queue", -hashing_pool.workers)
+    resp = client.post(v1_router.url_path_for("User token"), data=credentials_payload)
+    assert resp.status_code == 503
+    assert "Retry-After" in resp.headers
+
+
+def test_save_user_hashes_inline_when_pool_is_full(monkeypatch):
+    monkeypatch.setattr(hashing_pool, "queue", -hashing_pool.workers)
+    user = CustomUser(username=f"user-{uuid4().hex}", password="secret")
+    user.save()
+    try:
+        assert check_password("secret", user.password)
+    finally:
+        user.delete()
+
+
+def test_hashing_pool_recovers_from_dead_worker():
+    with pytest.raises(BrokenProcessPool):
+        hashing_pool.submit(os._exit, 1).result()
+    assert len(hashing_pool.run(make_password, "secret")) == 88
+
+
 def test_job_listings():
     resp = client.get(v1_router.url_path_for("Job listings"))
     assert resp.is_success
 
 
+def test_job_listings_cursor_pagination():
+    resp = client.get(
+        v1_router.url_path_for("Job listings"), params={"limit": 2, "with_total": False}
+    )
+    assert resp.is_success
+    first_page = resp.json()
+    assert first_page["total"] is None
+    assert first_page["prev"] is None
+    if first_page["next"]:
+        resp1 = client.get(
+            v1_router.url_path_for("Job listings"),
+            params={"limit": 2, "cursor": first_page["next"]},
+        )
+        assert resp1.is_success
+        second_page = resp1.json()
+        seen_ids = {job["id"] for job in first_page["jobs"]}
+        assert seen_ids.isdisjoint(job["id"] for job in second_page["jobs"])
+        resp2 = client.get(
+            v1_router.url_path_for("Job listings"),
+            params={"limit": 2, "cursor": second_page["prev"]},
+        )
+        assert resp2.json()["jobs"] == first_page["jobs"]
+
+
+def test_job_listings_invalid_cursor():
+    resp = client.get(v1_router.url_path_for("Job listings"), params={"cursor": "x"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_export_job_listings(format: str):
+    resp = client.get(
+        v1_router.url_path_for("Export job listings"),
+        params={"format": format, "type": "Internship"},
+    )
+    assert resp.is_success
+    lines = resp.text.splitlines()
+    if format == "csv":
+        assert lines[0].startswith("id,company_id,company_username")
+        lines = lines[1:]
+    assert all("Internship" in line for line in lines)
+
+
+def test_export_reads_in_short_queries(monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_EXPORT_CHUNK_SIZE", 2)
+    jobs = filter_jobs_available()
+
+    async def export() -> list[dict]:
+        rows = []
+        async for chunk in export_jobs(jobs, "ndjson"):
+            rows.extend(json.loads(line) for line in chunk.splitlines())
+            # Writers are not held back by a paused export
+            await run_sync(jobs.filter(id=rows[-1]["id"]).update, title=F("title"))
+        return rows
+
+    rows = anyio.run(export)
+    assert [row["id"] for row in rows] == list(
+        jobs.order_by("-updated_at", "-id").values_list("id", flat=True)
+    )
+
+
+def test_search_jobs():
+    keyword = uuid4().hex
+    resp = client.post(
+        v1_router.url_path_for("Add new job"),
+        json=dict(
+            NewJob.model_config["json_schema_extra"]["example"],
+            title=f"Senior {keyword} Engineer",
+        ),
+        headers=auth_request_headers(),
+    )
+    assert resp.is_success
+    resp1 = client.get(
+        v1_router.url_path_for("Search jobs"), params={"q": f"{keyword} engineers"}
+    )
+    assert resp1.is_success
+    assert resp.json()["id"] in [job["id"] for job in resp1.json()["jobs"]]
+
+
+def test_search_index_filled_when_created():
+    job = Job.objects.order_by("id").first()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE {search.fts_table}")
+    signals.create_search_index(None, app_config=apps.get_app_config("jobs"))
+    assert job.id in search.search_job_ids(job.title, limit=100, available_only=False)
+
+
 def test_get_job_by_id():
     resp = client.get(v1_router.url_path_for("Get job by ID", id=1))
     assert resp.is_success
 
 
+def test_get_job_by_id_not_modified():
+    resp = client.get(v1_router.url_path_for("Get job by ID", id=1))
+    assert resp.is_success
+    resp1 = client.get(
+        v1_router.url_path_for("Get job by ID", id=1),
+        headers={"If-None-Match": resp.headers["ETag"]},
+    )
+    assert resp1.status_code == 304
+
+
+def test_cached_job_is_invalidated_on_update():
+    resp = client.post(
+        v1_router.url_path_for("Add new job"),
+        json=NewJob.model_config["json_schema_extra"]["example"],
+        headers=auth_request_headers(),
+    )
+    job_path = v1_router.url_path_for("Get job by ID", id=resp.json()["id"])
+    assert client.get(job_path).is_success
+    resp1 = client.patch(
+        v1_router.url_path_for("Update existing job"),
+        json={"id": resp.json()["id"], "description": "Updated description"},
+        headers=auth_request_headers(),
+    )
+    assert resp1.is_success
+    assert client.get(job_path).json()["description"] == "Updated description"
+
+
+def test_job_facets_match_listings():
+    facets_path = v1_router.url_path_for("Job facets")
+    facets = client.get(facets_path, params={"type": "Internship"}).json()
+    listings_path = v1_router.url_path_for("Job listings")
+    assert (
+        facets["total"]
+        == client.get(listings_path, params={"type": "Internship"}).json()["total"]
+    )
+    for facet in facets["types"]:
+        assert (
+            facet["count"]
+            == client.get(listings_path, params={"type": facet["type"]}).json()["total"]
+        )
+    assert facets["total"] == sum(facet["count"] for facet in facets["salaries"])
+    assert facets["total"] == sum(facet["count"] for facet in facets["categories"])
+
+
+def test_cached_job_facets_follow_new_job():
+    facets_path = v1_router.url_path_for("Job facets")
+    total = client.get(facets_path, params={"category_id": 1}).json()["total"]
+    resp = client.post(
+        v1_router.url_path_for("Add new job"),
+        json=NewJob.model_config["json_schema_extra"]["example"],
+        headers=auth_request_headers(),
+    )
+    assert resp.is_success
+    assert client.get(facets_path, params={"category_id": 1}).json()["total"] == (
+        total + 1
+    )
+
+
 def get_categories_available():
     resp = client.get(v1_router.url_path_for("Category listings"))
     assert resp.is_success
@@ -40,6 +226,31 @@ def test_get_category_details():
     assert resp.is_success
 
 
+def test_category_jobs_amount_follows_new_job():
+    category_path = v1_router.url_path_for("Category Details", id=1)
+    jobs_amount = client.get(category_path).json()["jobs_amount"]
+    resp = client.post(
+        v1_router.url_path_for("Add new job"),
+        json=NewJob.model_config["json_schema_extra"]["example"],
+        headers=auth_request_headers(),
+    )
+    assert resp.is_success
+    assert client.get(category_path).json()["jobs_amount"] == jobs_amount + 1
+
+
+def test_category_jobs_amount_recounted_after_upgrade():
+    jobs_config = apps.get_app_config("jobs")
+    signals.detect_outdated_jobs_amount(None, app_config=jobs_config, using="default")
+    assert "default" not in signals.outdated_jobs_amount
+    # As left behind by `migrate` adding the column to existing categories
+    JobCategory.objects.update(jobs_amount=0)
+    signals.outdated_jobs_amount.add("default")
+    signals.recount_outdated_jobs_amount(None, app_config=jobs_config, using="default")
+    assert "default" not in signals.outdated_jobs_amount
+    category = JobCategory.objects.annotate(count=Count("jobs")).get(id=1)
+    assert category.jobs_amount == category.count > 0
+
+
 def test_generate_new_token():
     resp = client.patch(
         v1_router.url_path_for("Generate new token"), headers=auth_request_headers()
@@ -47,6 +258,31 @@ def test_generate_new_token():
     assert resp.is_success
 
 
+def test_rotated_token_is_rejected():
+    old_headers = dict(auth_request_headers())
+    assert client.get(
+        v1_router.url_path_for("Get details about current user"), headers=old_headers
+    ).is_success
+    resp = client.patch(
+        v1_router.url_path_for("Generate new token"), headers=old_headers
+    )
+    assert resp.is_success
+    resp1 = client.get(
+        v1_router.url_path_for("Get details about current user"), headers=old_headers
+    )
+    assert resp1.status_code == 401
+
+
+def test_cached_user_is_not_shared():
+    token = auth_request_headers()["Authorization"].split(" ")[1]
+    user = CustomUser.objects.get(token=token)
+    token_cache.set(token, user, token_cache.generation)
+    cached = token_cache.get(token)
+    cached.token = "jbc_changed"
+    assert cached is not user and user.token == token
+    assert token_cache.get(token).token == token
+
+
 def test_add_new_job():
     resp = client.post(
         v1_router.url_path_for("Add new job"),
@@ -86,6 +322,63 @@ def test_delete_a_job():
     assert resp1.is_success
 
 
+def test_bulk_job_operations():
+    new_job = NewJob.model_config["json_schema_extra"]["example"]
+    resp = client.post(
+        v1_router.url_path_for("Bulk job operations"),
+        json={"operations": [{"action": "create", "job": new_job}] * 2},
+        headers=auth_request_headers(),
+    )
+    assert resp.is_success
+    created_ids = [result["id"] for result in resp.json()["results"]]
+    resp1 = client.post(
+        v1_router.url_path_for("Bulk job operations"),
+        json={
+            "operations": [
+                {"action": "update", "job": {"id": created_ids[0], "title": "Updated"}},
+                {"action": "delete", "id": created_ids[1]},
+                {"action": "create", "job": dict(new_job, category_id=0)},
+            ]
+        },
+        headers=auth_request_headers(),
+    )
+    assert resp1.is_success
+    assert [result["success"] for result in resp1.json()["results"]] == [
+        True,
+        True,
+        False,
+    ]
+    resp2 = client.get(v1_router.url_path_for("Get job by ID", id=created_ids[0]))
+    assert resp2.json()["details"]["title"] == "Updated"
+    resp3 = client.get(v1_router.url_path_for("Get job by ID", id=created_ids[1]))
+    assert resp3.status_code == 404
+
+
+def test_get_job_appliers_pagination():
+    resp = client.post(
+        v1_router.url_path_for("Add new job"),
+        json=NewJob.model_config["json_schema_extra"]["example"],
+        headers=auth_request_headers(),
+    )
+    assert resp.is_success
+    job_id = resp.json()["id"]
+    resp1 = client.post(
+        v1_router.url_path_for("Apply for a specific job", id=job_id),
+        headers=auth_request_headers(),
+    )
+    assert resp1.is_success
+    resp2 = client.get(
+        v1_router.url_path_for("Get users who applied a specific job", id=job_id),
+        params={"limit": 1},
+        headers=auth_request_headers(),
+    )
+    assert resp2.is_success
+    page = resp2.json()
+    assert page["total"] == 1
+    assert page["applicants"][0]["status"] == "Pending"
+    assert page["next"] is None
+
+
 def test_get_company_details():
     resp = client.get(v1_router.url_path_for("Get company details", id=1))
     assert resp.is_success
@@ -122,9 +415,112 @@ def test_unapply_specific_job():
     assert resp1.is_success
 
 
+def test_apply_is_idempotent():
+    headers = auth_request_headers()
+    job_id = client.post(
+        v1_router.url_path_for("Add new job"),
+        json=NewJob.model_config["json_schema_extra"]["example"],
+        headers=headers,
+    ).json()["id"]
+    apply_path = v1_router.url_path_for("Apply for a specific job", id=job_id)
+    resp = client.post(apply_path, headers=headers)
+    assert resp.json()["detail"] == "Job applied successfully"
+    resp1 = client.post(apply_path, headers=headers)
+    assert resp1.is_success
+    assert resp1.json()["detail"] == "Job already applied"
+    unapply_path = v1_router.url_path_for("Unapply a speficic job", id=job_id)
+    assert client.delete(unapply_path, headers=headers).is_success
+    assert client.delete(unapply_path, headers=headers).is_success
+
+
+def test_apply_unknown_job():
+    resp = client.post(
+        v1_router.url_path_for("Apply for a specific job", id=10**9),
+        headers=auth_request_headers(),
+    )
+    assert resp.status_code == 404
+
+
+def test_apply_many_jobs():
+    headers = auth_request_headers()
+    job_ids = [
+        client.post(
+            v1_router.url_path_for("Add new job"),
+            json=NewJob.model_config["json_schema_extra"]["example"],
+            headers=headers,
+        ).json()["id"]
+        for _ in range(2)
+    ]
+    client.post(
+        v1_router.url_path_for("Apply for a specific job", id=job_ids[0]),
+        headers=headers,
+    )
+    resp = client.post(
+        v1_router.url_path_for("Apply for many jobs"),
+        json={"job_ids": [job_ids[0], job_ids[1], 10**9, job_ids[1]]},
+        headers=headers,
+    )
+    assert resp.is_success
+    assert resp.json() == {
+        "applied": [job_ids[1]],
+        "already_applied": [job_ids[0]],
+        "not_found": [10**9],
+    }
+
+
 def test_get_jobs_applied():
     resp = client.get(
         v1_router.url_path_for("Get jobs applied"),
         headers=auth_request_headers(),
     )
     assert resp.is_success
+
+
+def test_get_recommended_jobs():
+    from jobs.recommendations import job_index
+
+    headers = auth_request_headers()
+    resp = client.post(
+        v1_router.url_path_for("Apply for a specific job", id=1), headers=headers
+    )
+    assert resp.is_success
+    job_index.load()
+    resp1 = client.get(
+        v1_router.url_path_for("Get recommended jobs"),
+        params={"limit": 5},
+        headers=headers,
+    )
+    assert resp1.is_success
+    jobs = resp1.json()["jobs"]
+    assert 0 < len(jobs) <= 5
+    assert 1 not in [job["id"] for job in jobs]
+
+
+def test_fake_data_counts_inserted_rows():
+    fake_job = FakeJob(seed=1)
+    fake_job.category(2)
+    assert fake_job.category(2) == 0
+
+
+def test_admin_search_is_not_capped(monkeypatch):
+    job_admin = admin.site._registry[Job]
+    monkeypatch.setattr(job_admin, "list_max_show_all", 1)
+    job = Job.objects.first()
+    term = uuid4().hex
+    created = [
+        Job.objects.create(
+            company_id=job.company_id,
+            category_id=job.category_id,
+            title=f"Admin search {term}",
+            min_salary=1,
+            max_salary=2,
+            description="Found by admin search",
+        )
+        for _ in range(3)
+    ]
+    try:
+        jobs, _ = job_admin.get_search_results(None, Job.objects.all(), term)
+        assert set(jobs) == set(created)
+    finally:
+        for job in created:
+            job.delete()
@@ -0,0 +1,500 @@
+"""In-process caches for v1"""
+
+import os
+import copy
+import time
+import uuid
+import asyncio
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple
+from urllib.parse import parse_qsl, urlencode
+from django.conf import settings
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from jobs.models import Job, JobCategory
+from jobs.signals import bulk_saved, bulk_deleted
+from users.models import CustomUser
+
+
+class SharedGeneration:
+    """Invalidation marker shared by all workers through a file.
+
+    `bump` writes a new generation and `changed` tells whether another
+    worker did so, re-reading the file at most once every `check_interval`
+    seconds.
+    """
+
+    def __init__(self, path: Path, check_interval: float = 0.5):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._value = self._read()
+        self._next_check = time.monotonic() + check_interval
+
+    def _read(self) -> str | None:
+        try:
+            return self.path.read_text()
+        except OSError:
+            return None
+
+    def bump(self):
+        self._value = uuid.uuid4().hex
+        staging_file = self.path.with_name(f"{self.path.name}.{os.getpid()}")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            staging_file.write_text(self._value)
+            os.replace(staging_file, self.path)
+        except OSError:
+            pass
+
+    def changed(self, now: float) -> bool:
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+        value = self._read()
+        if value == self._value:
+            return False
+        self._value = value
+        return True
+
+
+class TokenCache:
+    """Bounded LRU cache of token -> user with per entry expiry.
+
+    Invalidations are recorded in a generation file shared by all workers.
+    Each worker re-reads the file at most once every `check_interval` seconds
+    and drops its entries once the generation changes.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        generation_file: Path,
+        check_interval: float = 0.5,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, CustomUser]] = OrderedDict()
+        self._tokens_by_user: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._shared_generation = SharedGeneration(generation_file, check_interval)
+        self.generation = 0
+
+    def _clear(self):
+        self._entries.clear()
+        self._tokens_by_user.clear()
+        self.generation += 1
+
+    def _sync(self, now: float):
+        if self._shared_generation.changed(now):
+            with self._lock:
+                self._clear()
+
+    def get(self, token: str) -> CustomUser | None:
+        """Copy of the cached user owning the token if any. Callers may
+        change it without affecting the cached one"""
+        now = time.monotonic()
+        self._sync(now)
+        entry = self._entries.get(token)
+        if entry is None or entry[0] < now:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self._lock:
+            if token in self._entries:
+                self._entries.move_to_end(token)
+        return copy.copy(entry[1])
+
+    def set(self, token: str, user: CustomUser, generation: int):
+        """Caches user unless invalidations happened since `generation`"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[token] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(token)
+            self._tokens_by_user[user.pk] = token
+            while len(self._entries) > self.maxsize:
+                _, (_, evicted_user) = self._entries.popitem(last=False)
+                self._tokens_by_user.pop(evicted_user.pk, None)
+
+    def invalidate(self, user_id: int):
+        """Drops user's cached token in this and every other worker"""
+        with self._lock:
+            token = self._tokens_by_user.pop(user_id, None)
+            if token is not None:
+                self._entries.pop(token, None)
+            self.generation += 1
+            self._shared_generation.bump()
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+token_cache = TokenCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL,
+    generation_file=settings.TOKEN_CACHE_GENERATION_FILE,
+)
+
+
+def invalidate_cached_user(sender, instance: CustomUser, **kwargs):
+    token_cache.invalidate(instance.pk)
+
+
+post_save.connect(invalidate_cached_user, sender=CustomUser)
+post_delete.connect(invalidate_cached_user, sender=CustomUser)
+
+
+class CachedResponse(NamedTuple):
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    etag: bytes
+    tags: tuple[str, ...]
+    route: Any
+    fresh_until: float
+    stale_until: float
+
+
+class ResponseCache:
+    """Bounded LRU cache of rendered GET responses keyed on path and query.
+
+    Entries carry tags such as `job:1` so that writes drop only the
+    responses they affect. Other workers learn about writes through a
+    shared generation file and drop all of their entries, at most
+    `check_interval` seconds later.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        stale: float,
+        generation_file: Path,
+        check_interval: float = 0.5,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale = stale
+        self.hits = 0
+        self.misses = 0
+        self.endpoints: dict[Callable, tuple[str, ...]] = {}
+        self.generation = 0
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._keys_by_tag: dict[str, set[str]] = {}
+        # Generation at which each tag, or every tag, was last invalidated
+        self._invalidated: dict[str, int] = {}
+        self._cleared = 0
+        self._lock = threading.Lock()
+        self._shared_generation = SharedGeneration(generation_file, check_interval)
+
+    @staticmethod
+    def make_key(path: str, query_string: bytes) -> str:
+        query = sorted(
+            parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+        )
+        return f"{path}?{urlencode(query)}" if query else path
+
+    def get(self, key: str) -> CachedResponse | None:
+        now = time.monotonic()
+        if self._shared_generation.changed(now):
+            with self._lock:
+                self._clear()
+        entry = self._entries.get(key)
+        if entry is None or entry.stale_until < now:
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse, generation: int):
+        """Stores entry unless its tags were invalidated since `generation`"""
+        with self._lock:
+            if self._cleared > generation or any(
+                self._invalidated.get(tag, 0) > generation for tag in entry.tags
+            ):
+                return
+            self._discard(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def _clear(self):
+        self.generation += 1
+        self._cleared = self.generation
+        self._invalidated.clear()
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def invalidate(self, *tags: str):
+        """Drops responses carrying any of the tags in every worker"""
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                self._invalidated[tag] = self.generation
+                for key in tuple(self._keys_by_tag.get(tag, ())):
+                    self._discard(key)
+            if len(self._invalidated) > self.maxsize:
+                # Forgetting tags is only safe once renders in flight are void
+                self._invalidated.clear()
+                self._cleared = self.generation
+            self._shared_generation.bump()
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+response_cache = ResponseCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    stale=settings.RESPONSE_CACHE_STALE,
+    generation_file=settings.RESPONSE_CACHE_GENERATION_FILE,
+)
+
+
+def cache_response(*tags: str):
+    """Marks endpoint responses as cacheable under the given tags.
+    Tags may reference path parameters e.g `job:{id}`"""
+
+    def decorator(func):
+        response_cache.endpoints[func] = tags
+        return func
+
+    return decorator
+
+
+class ResponseCacheMiddleware:
+    """Serves endpoints marked with `cache_response` from `ResponseCache`.
+
+    Responses carry a strong ETag and requests whose `If-None-Match`
+    matches it get an empty `304`. Stale entries are served while a fresh
+    copy is rendered in the background.
+    """
+
+    def __init__(self, app: ASGIApp, cache: ResponseCache = response_cache):
+        self.app = app
+        self.cache = cache
+        self.cache_control = (
+            f"public, max-age={int(cache.ttl)}, "
+            f"stale-while-revalidate={int(cache.stale)}"
+        ).encode()
+        self._refreshing: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        key = self.cache.make_key(scope["path"], scope["query_string"])
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.hits += 1
+            # Lets outer middleware see which route the entry belongs to
+            scope["route"] = entry.route
+            if entry.fresh_until < time.monotonic() and key not in self._refreshing:
+                self._refreshing.add(key)
+                task = asyncio.create_task(self._refresh(dict(scope), key))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            await self._send_entry(scope, send, entry)
+            return
+
+        await self._render(scope, receive, send, key)
+
+    async def _render(self, scope: Scope, receive: Receive, send: Send | None, key):
+        generation = self.cache.generation
+        start_message: Message | None = None
+        body_chunks: list[bytes] = []
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message
+            if start_message is None and message["type"] == "http.response.start":
+                tags = self.cache.endpoints.get(scope.get("endpoint"))
+                if tags is None or message["status"] != 200:
+                    start_message = {}
+                    if send is not None:
+                        await send(message)
+                else:
+                    start_message = message
+                return
+            if not start_message:
+                if send is not None:
+                    await send(message)
+                return
+            body_chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            entry = self._make_entry(scope, start_message, b"".join(body_chunks))
+            self.cache.set(key, entry, generation)
+            if send is not None:
+                self.cache.misses += 1
+                await self._send_entry(scope, send, entry)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _refresh(self, scope: Scope, key: str):
+        request_sent = False
+
+        async def receive() -> Message:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            return {"type": "http.disconnect"}
+
+        try:
+            await self._render(scope, receive, None, key)
+        except Exception:
+            # Stale entry stays in place until it expires
+            pass
+        finally:
+            self._refreshing.discard(key)
+
+    def _make_entry(self, scope: Scope, message: Message, body: bytes):
+        path_params = scope.get("path_params", {})
+        tags = tuple(
+            tag.format(**path_params) for tag in self.cache.endpoints[scope["endpoint"]]
+        )
+        etag = b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode() + b'"'
+        headers = [
+            (name, value)
+            for name, value in message["headers"]
+            if name not in (b"etag", b"cache-control")
+        ]
+        headers.append((b"etag", etag))
+        headers.append((b"cache-control", self.cache_control))
+        now = time.monotonic()
+        return CachedResponse(
+            status=message["status"],
+            headers=headers,
+            body=body,
+            etag=etag,
+            tags=tags,
+            route=scope.get("route"),
+            fresh_until=now + self.cache.ttl,
+            stale_until=now + self.cache.ttl + self.cache.stale,
+        )
+
+    @staticmethod
+    def etag_matches(scope: Scope, etag: bytes) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                candidates = [item.strip() for item in value.split(b",")]
+                return b"*" in candidates or etag in candidates
+        return False
+
+    async def _send_entry(self, scope: Scope, send: Send, entry: CachedResponse):
+        if self.etag_matches(scope, entry.etag):
+            headers = [
+                (name, value)
+                for name, value in entry.headers
+                if name not in (b"content-length", b"content-type")
+            ]
+            await send(
+                {"type": "http.response.start", "status": 304, "headers": headers}
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": entry.status,
+                "headers": entry.headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+def remember_company_username(sender, instance: CustomUser, **kwargs):
+    instance._saved_username = instance.__dict__.get("username")
+
+
+def invalidate_job_category(sender, instance: Job, **kwargs):
+    saved_category_id = getattr(instance, "_saved_category_id", None)
+    if saved_category_id is not None and saved_category_id != instance.category_id:
+        response_cache.invalidate(f"category:{saved_category_id}")
+
+
+def invalidate_job(sender, instance: Job, **kwargs):
+    response_cache.invalidate(
+        "jobs", f"job:{instance.id}", "categories", f"category:{instance.category_id}"
+    )
+
+
+def invalidate_bulk_saved_jobs(
+    sender,
+    created: list[Job],
+    updated: list[Job],
+    saved_category_ids: dict[int, int],
+    **kwargs,
+):
+    tags = {"jobs", "categories"}
+    for job in created + updated:
+        tags.update((f"job:{job.id}", f"category:{job.category_id}"))
+    tags.update(
+        f"category:{category_id}" for category_id in saved_category_ids.values()
+    )
+    response_cache.invalidate(*tags)
+
+
+def invalidate_bulk_deleted_jobs(sender, deleted: list[Job], **kwargs):
+    tags = {"jobs", "categories"}
+    for job in deleted:
+        tags.update((f"job:{job.id}", f"category:{job.category_id}"))
+    response_cache.invalidate(*tags)
+
+
+def invalidate_category(sender, instance: JobCategory, **kwargs):
+    response_cache.invalidate("jobs", "job", "categories", f"category:{instance.id}")
+
+
+def invalidate_company(sender, instance: CustomUser, **kwargs):
+    if instance._saved_username != instance.username:
+        response_cache.invalidate("jobs", "job", f"company:{instance.id}")
+    else:
+        response_cache.invalidate(f"company:{instance.id}")
+    instance._saved_username = instance.username
+
+
+post_init.connect(remember_company_username, sender=CustomUser)
+pre_save.connect(invalidate_job_category, sender=Job)
+post_save.connect(invalidate_job, sender=Job)
+post_delete.connect(invalidate_job, sender=Job)
+bulk_saved.connect(invalidate_bulk_saved_jobs, sender=Job)
+bulk_deleted.connect(invalidate_bulk_deleted_jobs, sender=Job)
+post_save.connect(invalidate_category, sender=JobCategory)
+post_delete.connect(invalidate_category, sender=JobCategory)
+post_save.connect(invalidate_company, sender=CustomUser)
+post_delete.connect(invalidate_company, sender=CustomUser)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, PositiveInt, EmailStr, field_validator
-from typing import Literal, Optional, TypeAlias
+from typing import Annotated, Literal, Optional, TypeAlias, Union
 from datetime import datetime, date
 from django.templatetags.static import static
 from django.conf import settings
@@ -39,13 +39,23 @@ class JobResponse(BaseModel):
 
 
 class JobsAvailable(BaseModel):
-    total: int = Field(description="Total jobs available")
+    total: Optional[int] = Field(
+        default=None, description="Total jobs available. Null when not counted"
+    )
     jobs: list[JobResponse]
+    next: Optional[str] = Field(
+        default=None, description="Cursor for the following page of jobs"
+    )
+    prev: Optional[str] = Field(
+        default=None, description="Cursor for the preceding page of jobs"
+    )
 
     model_config = {
         "json_schema_extra": {
             "example": {
                 "total": 2,
+                "next": "WyIyMDIzLTEwLTAyVDEyOjAwOjAwKzAwOjAwIiwyLCJuZXh0Il0",
+                "prev": None,
                 "jobs": [
                     {
                         "id": 1,
@@ -102,6 +112,61 @@ class JobDetails(BaseModel):
     }
 
 
+class TypeFacet(BaseModel):
+    type: JobType
+    count: int
+
+
+class CategoryFacet(BaseModel):
+    id: int
+    name: str
+    count: int
+
+
+class SalaryFacet(BaseModel):
+    min_salary: int = Field(description="Least minimum salary in the bucket")
+    max_salary: Optional[int] = Field(
+        description="Minimum salary the bucket stays below. Null when unbounded"
+    )
+    count: int
+
+
+class JobFacets(BaseModel):
+    total: int = Field(description="Jobs matching all the filters")
+    types: list[TypeFacet] = Field(
+        description="Jobs per type, counted without the `type` filter"
+    )
+    categories: list[CategoryFacet] = Field(
+        description="Jobs per category, counted without the `category_id` filter"
+    )
+    salaries: list[SalaryFacet] = Field(
+        description="Jobs per minimum salary bucket matching all the filters"
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "total": 120,
+                "types": [
+                    {"type": "Full-time", "count": 120},
+                    {"type": "Internship", "count": 30},
+                ],
+                "categories": [
+                    {"id": 1, "name": "Software Engineering", "count": 80},
+                    {"id": 2, "name": "Data Science", "count": 40},
+                ],
+                "salaries": [
+                    {"min_salary": 0, "max_salary": 30000, "count": 10},
+                    {"min_salary": 30000, "max_salary": 60000, "count": 25},
+                    {"min_salary": 60000, "max_salary": 90000, "count": 45},
+                    {"min_salary": 90000, "max_salary": 120000, "count": 30},
+                    {"min_salary": 120000, "max_salary": None, "count": 10},
+                ],
+            }
+        }
+    }
+
+
 class CategoryInfo(BaseModel):
     id: int
     name: str
@@ -226,6 +291,105 @@ class UpdateJob(NewJob):
     }
 
 
+class BulkCreateJob(BaseModel):
+    action: Literal["create"]
+    job: NewJob
+
+
+class BulkUpdateJob(BaseModel):
+    action: Literal["update"]
+    job: UpdateJob
+
+
+class BulkDeleteJob(BaseModel):
+    action: Literal["delete"]
+    id: int
+
+
+BulkJobOperation: TypeAlias = Annotated[
+    Union[BulkCreateJob, BulkUpdateJob, BulkDeleteJob], Field(discriminator="action")
+]
+
+bulk_jobs_limit = 1000
+
+
+class BulkJobs(BaseModel):
+    operations: list[BulkJobOperation] = Field(
+        description="Jobs to create, update or delete", max_length=bulk_jobs_limit
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "operations": [
+                    {
+                        "action": "create",
+                        "job": NewJob.model_config["json_schema_extra"]["example"],
+                    },
+                    {
+                        "action": "update",
+                        "job": {"id": 1, "is_available": False},
+                    },
+                    {"action": "delete", "id": 2},
+                ]
+            }
+        }
+    }
+
+
+class BulkJobResult(BaseModel):
+    action: Literal["create", "update", "delete"]
+    id: Optional[int] = Field(default=None, description="Job id")
+    success: bool
+    detail: Optional[str] = Field(default=None, description="Reason of failure")
+
+
+class BulkJobsFeedback(BaseModel):
+    results: list[BulkJobResult] = Field(description="Outcome per operation in order")
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "results": [
+                    {"action": "create", "id": 3, "success": True, "detail": None},
+                    {"action": "update", "id": 1, "success": True, "detail": None},
+                    {
+                        "action": "delete",
+                        "id": 2,
+                        "success": False,
+                        "detail": "You can only delete a job that you posted.",
+                    },
+                ]
+            }
+        }
+    }
+
+
+bulk_apply_limit = 100
+
+
+class BulkApply(BaseModel):
+    job_ids: list[int] = Field(
+        description="Ids of jobs to apply for",
+        min_length=1,
+        max_length=bulk_apply_limit,
+    )
+
+    model_config = {"json_schema_extra": {"example": {"job_ids": [1, 2, 3]}}}
+
+
+class BulkApplyFeedback(BaseModel):
+    applied: list[int] = Field(description="Jobs applied by this request")
+    already_applied: list[int] = Field(description="Jobs applied before")
+    not_found: list[int] = Field(description="Jobs that do not exist")
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {"applied": [1, 3], "already_applied": [2], "not_found": []}
+        }
+    }
+
+
 class CompanyDetails(BaseModel):
     id: int
     username: str
@@ -298,9 +462,21 @@ class CompleteApplicantDetails(CompanyDetails):
             return None
 
 
+class JobApplicant(CompleteApplicantDetails):
+    applied_at: datetime = Field(description="Date when the user applied")
+    status: Literal["Pending", "Reviewed", "Accepted", "Rejected"] = Field(
+        description="Progress of the application"
+    )
+
+
 class JobApplicants(BaseModel):
-    total: int = Field(description="Job applicants amount")
-    applicants: list[CompleteApplicantDetails]
+    total: Optional[int] = Field(
+        default=None, description="Job applicants amount. Null when not counted"
+    )
+    applicants: list[JobApplicant]
+    next: Optional[str] = Field(
+        default=None, description="Cursor for the following page of applicants"
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -321,6 +497,8 @@ class JobApplicants(BaseModel):
                         "gender": "Male",
                         "dob": "1990-01-01",
                         "document": "/media/resumes/john_doe_resume.pdf",
+                        "applied_at": "2024-01-02T10:00:00Z",
+                        "status": "Pending",
                     },
                     {
                         "id": 2,
@@ -336,8 +514,11 @@ class JobApplicants(BaseModel):
                         "gender": "Female",
                         "dob": "1985-05-15",
                         "document": "/media/resumes/jane_smith_resume.pdf",
+                        "applied_at": "2024-01-01T09:30:00Z",
+                        "status": "Reviewed",
                     },
                 ],
+                "next": None,
             }
         }
     }
@@ -0,0 +1,29 @@
+"""JSON responses for models built from our own database rows.
+
+FastAPI validates whatever an endpoint returns against its response model,
+dumps it again through `jsonable_encoder` and only then encodes it. Models
+made by `serialize_jobs` and friends are already in shape so endpoints
+returning them can hand a `TrustedJSONResponse` back instead and keep the
+return annotation for the OpenAPI document.
+"""
+
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def dump_model(value: Any) -> dict:
+    """Field values of pydantic models for orjson. Only suitable for models
+    without aliases or custom serializers"""
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class TrustedJSONResponse(JSONResponse):
+    """Encodes content with orjson without validating it"""
+
+    def render(self, content: Any) -> bytes:
+        # `Z` suffix matches pydantic's rendering of UTC datetimes
+        return orjson.dumps(content, default=dump_model, option=orjson.OPT_UTC_Z)
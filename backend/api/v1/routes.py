@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Query, status, HTTPException, Depends, Path
 from fastapi.security.oauth2 import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from typing import Annotated, Literal
 from api.v1.models import (
     JobsAvailable,
     JobDetails,
+    JobFacets,
     CategoriesAvailable,
     TokenAuth,
     Feedback,
@@ -14,16 +16,43 @@ from api.v1.models import (
     CategoryInfo,
     CompanyDetails,
     CompleteApplicantDetails,
+    JobApplicant,
     JobApplicants,
+    BulkJobs,
+    BulkJobResult,
+    BulkJobsFeedback,
+    BulkApply,
+    BulkApplyFeedback,
 )
-from api.v1.utils import generate_token, token_id, validate_category_id
-from jobs.models import Job, JobCategory
+from api.v1.cache import token_cache, cache_response
+from api.v1.responses import TrustedJSONResponse
+from api.v1.utils import (
+    generate_token,
+    token_id,
+    validate_category_id,
+    encode_cursor,
+    decode_cursor,
+    seek_jobs,
+    job_response_rows,
+    serialize_jobs,
+    filter_jobs_available,
+    run_sync,
+    export_jobs,
+    count_job_facets,
+)
+from jobs.models import Job, JobCategory, Application, Recommendation
+from jobs.signals import bulk_saved, bulk_deleted
+from jobs import search
 from users.models import CustomUser
-from django.contrib.auth.hashers import check_password
-import asyncio
+from users.hashers import acheck_password, HashingBusy
+from django.db import transaction
+from django.db.models import Q, Exists, OuterRef
+from django.utils import timezone
 
 router = APIRouter(prefix="/v1", tags=["v1"])
 
+export_media_types = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
 v1_auth_scheme = OAuth2PasswordBearer(
     tokenUrl="/api/v1/token",
     description="Generated API authentication token",
@@ -32,15 +61,16 @@ v1_auth_scheme = OAuth2PasswordBearer(
 
 async def get_user(token: Annotated[str, Depends(v1_auth_scheme)]) -> CustomUser:
     """Ensures token passed match the one set"""
-    if token:
-        try:
-            if token.startswith(token_id):
-
-                def fetch_user(token):
-                    return CustomUser.objects.get(token=token)
-
-                return await asyncio.to_thread(fetch_user, token)
+    if token and token.startswith(token_id):
+        user = token_cache.get(token)
+        if user is not None:
+            return user
 
+        generation = token_cache.generation
+        try:
+            user = await run_sync(CustomUser.objects.get, token=token)
+            token_cache.set(token, user, generation)
+            return user
         except CustomUser.DoesNotExist:
             pass
 
@@ -52,7 +82,7 @@ async def get_user(token: Annotated[str, Depends(v1_auth_scheme)]) -> CustomUser
 
 
 @router.post("/token", name="User token")
-def fetch_token(
+async def fetch_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ) -> TokenAuth:
     """
@@ -60,11 +90,11 @@ def fetch_token(
     - `password` : User password.
     """
     try:
-        user = CustomUser.objects.get(username=form_data.username)
-        if check_password(form_data.password, user.password):
+        user = await run_sync(CustomUser.objects.get, username=form_data.username)
+        if await acheck_password(form_data.password, user.password):
             if user.token is None:
                 user.token = generate_token()
-                user.save()
+                await user.asave()
             return TokenAuth(access_token=user.token, token_type="bearer")
         else:
             raise HTTPException(
@@ -75,17 +105,26 @@ def fetch_token(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User does not exist.",
         )
+    except HashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress. Try again shortly.",
+            headers={"Retry-After": "1"},
+        )
 
 
 @router.patch("/token", name="Generate new token")
-def generate_new_token(user: Annotated[CustomUser, Depends(get_user)]) -> TokenAuth:
+async def generate_new_token(
+    user: Annotated[CustomUser, Depends(get_user)]
+) -> TokenAuth:
     user.token = generate_token()
-    user.save()
+    await user.asave()
     return TokenAuth(access_token=user.token)
 
 
 @router.get("/jobs", name="Job listings")
-def get_jobs_available(
+@cache_response("jobs")
+async def get_jobs_available(
     type: Annotated[
         Literal["Internship", "Full-time", "All"],
         Query(description="Job type either `Intership` or `Full-time`"),
@@ -99,103 +138,211 @@ def get_jobs_available(
     start: Annotated[
         int, Query(description="Fetch jobs with id greater than this")
     ] = -1,
-    offset: Annotated[int, Query(description="Jobs available offset value")] = None,
+    cursor: Annotated[
+        str, Query(description="Page cursor as returned in `next` or `prev`")
+    ] = None,
+    offset: Annotated[
+        int,
+        Query(
+            description="Jobs available offset value. Prefer `cursor` for deep pages",
+            ge=0,
+        ),
+    ] = None,
     limit: Annotated[
         int, Query(description="Number of jobs not to exceed", ge=1, le=100)
     ] = 20,
+    with_total: Annotated[
+        bool, Query(description="Count all jobs matching the filters")
+    ] = True,
 ) -> JobsAvailable:
-    """Get jobs available"""
-    filter = {"is_available": True, "id__gt": start}
-    if type and type != "All":
-        filter["type__exact"] = type
-    if category_id is not None:
-        filter["category__id"] = category_id
-
-    if user_id is not None:
-        filter["id"] = id
-
-    objects: list[Job] = Job.objects.filter(**filter).order_by("-updated_at").all()
-    total_jobs_found = len(objects)
-    if offset is not None and len(objects) > offset:
-        objects = objects[offset:]
-    jobs_found = []
-    for count, job in enumerate(objects, start=1):
-        jobs_found.append(
-            JobResponse(
-                company_username=job.company.username,
-                category_name=job.category.name,
-                **jsonable_encoder(job),
-            )
+    """Get jobs available
+
+    Pages are keyed on `(updated_at, id)` so following `next`/`prev` cursors
+    costs the same regardless of how deep the page is.
+    """
+    objects = filter_jobs_available(type, category_id, user_id, start)
+    total_jobs_found = await run_sync(objects.count) if with_total else None
+
+    direction = "next"
+    if cursor is not None:
+        updated_at, id, direction = decode_cursor(cursor)
+        objects = seek_jobs(objects, updated_at, id, direction)
+    else:
+        objects = objects.order_by("-updated_at", "-id")
+
+    if offset is not None:
+        objects = objects[offset : offset + limit + 1]
+    else:
+        objects = objects[: limit + 1]
+
+    jobs_found = await serialize_jobs(objects)
+    has_more = len(jobs_found) > limit
+    jobs_found = jobs_found[:limit]
+    if direction == "prev":
+        jobs_found.reverse()
+
+    next_cursor = prev_cursor = None
+    if jobs_found:
+        first, last = jobs_found[0], jobs_found[-1]
+        if direction == "prev" or has_more:
+            next_cursor = encode_cursor(last.updated_at, last.id, "next")
+        if (direction == "next" and (cursor is not None or offset)) or (
+            direction == "prev" and has_more
+        ):
+            prev_cursor = encode_cursor(first.updated_at, first.id, "prev")
+
+    return TrustedJSONResponse(
+        JobsAvailable(
+            total=total_jobs_found, jobs=jobs_found, next=next_cursor, prev=prev_cursor
         )
-        if count == limit:
-            break
+    )
 
-    return JobsAvailable(total=total_jobs_found, jobs=jobs_found)
+
+@router.get("/jobs/export", name="Export job listings")
+async def export_jobs_available(
+    format: Annotated[
+        Literal["ndjson", "csv"], Query(description="Either `ndjson` or `csv`")
+    ] = "ndjson",
+    type: Annotated[
+        Literal["Internship", "Full-time", "All"],
+        Query(description="Job type either `Intership` or `Full-time`"),
+    ] = "All",
+    category_id: Annotated[
+        int, Query(description="Export jobs with this category id")
+    ] = None,
+    user_id: Annotated[
+        int, Query(description="Export jobs posted by user identified by this id")
+    ] = None,
+    start: Annotated[
+        int, Query(description="Export jobs with id greater than this")
+    ] = -1,
+) -> StreamingResponse:
+    """Stream every available job matching the listing filters
+
+    Rows are read from the database in chunks as the response is sent,
+    latest updated first.
+    """
+    objects = filter_jobs_available(type, category_id, user_id, start)
+    return StreamingResponse(
+        export_jobs(objects, format),
+        media_type=export_media_types[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="jobs.{format}"',
+        },
+    )
+
+
+@router.get("/jobs/facets", name="Job facets")
+@cache_response("jobs")
+async def get_job_facets(
+    type: Annotated[
+        Literal["Internship", "Full-time", "All"],
+        Query(description="Job type either `Intership` or `Full-time`"),
+    ] = "All",
+    category_id: Annotated[
+        int, Query(description="Count jobs with this category id")
+    ] = None,
+    user_id: Annotated[
+        int, Query(description="Count jobs posted by user identified by this id")
+    ] = None,
+    start: Annotated[
+        int, Query(description="Count jobs with id greater than this")
+    ] = -1,
+) -> JobFacets:
+    """Count available jobs per type, category and salary bucket
+
+    Takes the job listings filters. Counts per type ignore the `type` filter
+    and counts per category ignore `category_id` so that every choice shows
+    how many jobs it would list.
+    """
+    return TrustedJSONResponse(
+        await count_job_facets(type, category_id, user_id, start)
+    )
+
+
+@router.get("/jobs/search", name="Search jobs")
+async def search_jobs(
+    q: Annotated[
+        str, Query(description="Words to look up in job title and description")
+    ],
+    offset: Annotated[int, Query(description="Search results offset", ge=0)] = 0,
+    limit: Annotated[
+        int, Query(description="Number of jobs not to exceed", ge=1, le=100)
+    ] = 20,
+) -> JobsAvailable:
+    """Search available jobs, best matches first"""
+    job_ids = await run_sync(search.search_job_ids, q, limit=limit, offset=offset)
+    jobs_found = {
+        job.id: job
+        for job in await serialize_jobs(Job.objects.filter(id__in=job_ids))
+    }
+    return TrustedJSONResponse(
+        JobsAvailable(
+            jobs=[jobs_found[id] for id in job_ids if id in jobs_found],
+        )
+    )
 
 
 @router.get("/job/{id}", name="Get job by ID")
-def get_job_by_id(
+@cache_response("job", "job:{id}")
+async def get_job_by_id(
     id: int,
     whole: Annotated[
         bool, Query(description="Return all job details instead of just description")
     ] = True,
 ) -> JobDetails:
     """Get job details by ID"""
-    try:
-        target_job = Job.objects.get(id=id)
-        if whole:
-            return JobDetails(
-                details=JobResponse(
-                    company_username=target_job.company.username,
-                    category_name=target_job.category.name,
-                    **jsonable_encoder(target_job),
-                ),
-                description=target_job.description,
-            )
-        else:
-            return JobDetails(description=target_job.description)
-    except Job.DoesNotExist:
+    target_jobs = Job.objects.filter(id=id)
+    if whole:
+        target_job = await run_sync(job_response_rows(target_jobs, "description").first)
+    else:
+        target_job = await run_sync(target_jobs.values("description").first)
+    if target_job is None:
         raise HTTPException(
             status.HTTP_404_NOT_FOUND, f"Job with id '{id}'  does not exist"
         )
+    description = target_job.pop("description")
+    if whole:
+        return TrustedJSONResponse(
+            JobDetails(
+                details=JobResponse.model_construct(**target_job),
+                description=description,
+            )
+        )
+    else:
+        return TrustedJSONResponse(JobDetails(description=description))
 
 
 @router.get("/categories", name="Category listings")
-def get_categories_available(
+@cache_response("categories")
+async def get_categories_available(
     limit: Annotated[
         int, Query(description="Categories amount not to exceed", ge=1, le=100)
     ] = 50
 ) -> CategoriesAvailable:
     """Explore categories available"""
-    categories = JobCategory.objects.order_by("-created_on").all()
-
-    category_items = []
-
-    for count, category in enumerate(categories, start=1):
-        category_items.append(
-            dict(
-                id=category.id,
-                name=category.name,
-                description=category.description,
-                jobs_amount=Job.objects.filter(category=category).count(),
-            )
+    category_items = await run_sync(
+        list,
+        JobCategory.objects.order_by("-created_on").values(
+            "id", "name", "description", "jobs_amount"
+        )[:limit],
+    )
+    return TrustedJSONResponse(
+        CategoriesAvailable.model_construct(
+            total=len(category_items), categories=category_items
         )
-        if count == limit:
-            break
-    return CategoriesAvailable(total=len(category_items), categories=category_items)
+    )
 
 
 @router.get("/category/{id}", name="Category Details")
-def get_category_info(
+@cache_response("category:{id}")
+async def get_category_info(
     id: Annotated[int, Path(description="Category id")]
 ) -> CategoryInfo:
     """Specific category details"""
     try:
-        category = JobCategory.objects.get(id=id)
-        return CategoryInfo(
-            jobs_amount=Job.objects.filter(category=category).count(),
-            **jsonable_encoder(category),
-        )
+        category = await run_sync(JobCategory.objects.get, id=id)
+        return CategoryInfo(**jsonable_encoder(category))
     except JobCategory.DoesNotExist:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -208,13 +355,13 @@ def get_category_info(
     name="Add new job",
 )
 @validate_category_id
-def add_new_job(
+async def add_new_job(
     job_details: NewJob, user: Annotated[CustomUser, Depends(get_user)]
 ) -> UpdateJob:
     """Make new job entry"""
-    job = Job.objects.create(
+    job = await Job.objects.acreate(
         company=user,
-        category=JobCategory.objects.get(id=job_details.category_id),
+        category_id=job_details.category_id,
         title=job_details.title,
         type=job_details.type,
         min_salary=job_details.min_salary,
@@ -222,21 +369,20 @@ def add_new_job(
         description=job_details.description,
         is_available=job_details.is_available,
     )
-    job.save()
     return UpdateJob(**jsonable_encoder(job))
 
 
 @router.patch("/job", name="Update existing job")
 @validate_category_id
-def update_existing_job(
+async def update_existing_job(
     job_details: UpdateJob, user: Annotated[CustomUser, Depends(get_user)]
 ) -> UpdateJob:
     """Modify existing job"""
     get_value = lambda old, new: new if new is not None else old
     try:
-        target_job = Job.objects.get(id=job_details.id, company=user)
+        target_job = await Job.objects.aget(id=job_details.id, company=user)
         if job_details.category_id:
-            target_job.category = JobCategory.objects.get(id=job_details.category_id)
+            target_job.category_id = job_details.category_id
         target_job.title = get_value(target_job.title, job_details.title)
         target_job.type = get_value(target_job.type, job_details.type)
         target_job.max_salary = get_value(target_job.max_salary, job_details.max_salary)
@@ -247,7 +393,7 @@ def update_existing_job(
         target_job.is_available = get_value(
             target_job.is_available, job_details.is_available
         )
-        target_job.save()
+        await target_job.asave()
         return UpdateJob(**jsonable_encoder(target_job))
 
     except Job.DoesNotExist:
@@ -258,15 +404,15 @@ def update_existing_job(
 
 
 @router.delete("/job/{id}", name="Delete a job")
-def delete_existing_job(
+async def delete_existing_job(
     id: Annotated[int, Path(description="Job id")],
     user: Annotated[CustomUser, Depends(get_user)],
 ) -> Feedback:
     """Delete an existing job"""
     try:
-        target_job = Job.objects.get(id=id)
-        if target_job.company.id == user.id:
-            target_job.delete()
+        target_job = await Job.objects.aget(id=id)
+        if target_job.company_id == user.id:
+            await target_job.adelete()
             return Feedback(detail="Job deleted successfuly.")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -279,41 +425,189 @@ def delete_existing_job(
         )
 
 
+@router.post("/jobs/bulk", name="Bulk job operations")
+async def bulk_job_operations(
+    bulk_jobs: BulkJobs, user: Annotated[CustomUser, Depends(get_user)]
+) -> BulkJobsFeedback:
+    """Create, update and delete many jobs at once.
+
+    Valid operations are applied in a single transaction while invalid ones
+    are reported in `results` without affecting the rest.
+    """
+    operations = bulk_jobs.operations
+    category_ids = {
+        operation.job.category_id
+        for operation in operations
+        if operation.action != "delete" and operation.job.category_id is not None
+    }
+    existing_category_ids = await run_sync(
+        set,
+        JobCategory.objects.filter(id__in=category_ids).values_list("id", flat=True),
+    )
+    target_job_ids = {
+        operation.job.id if operation.action == "update" else operation.id
+        for operation in operations
+        if operation.action != "create"
+    }
+    owned_jobs = await run_sync(
+        Job.objects.filter(company=user).in_bulk, target_job_ids
+    )
+
+    results: list[BulkJobResult] = []
+    created_jobs: list[Job] = []
+    updated_jobs: dict[int, Job] = {}
+    saved_category_ids: dict[int, int] = {}
+    deleted_job_ids: set[int] = set()
+    now = timezone.now()
+    for operation in operations:
+        if operation.action == "delete":
+            job_id = operation.id
+        elif operation.action == "update":
+            job_id = operation.job.id
+        else:
+            job_id = None
+        result = BulkJobResult(action=operation.action, id=job_id, success=False)
+        results.append(result)
+
+        if (
+            operation.action != "delete"
+            and operation.job.category_id is not None
+            and operation.job.category_id not in existing_category_ids
+        ):
+            result.detail = (
+                f"Job category specified '{operation.job.category_id}' does not exist."
+            )
+        elif operation.action == "create":
+            created_jobs.append(Job(company=user, **operation.job.model_dump()))
+            result.success = True
+        elif job_id not in owned_jobs or job_id in deleted_job_ids:
+            result.detail = f"You can only {operation.action} a job that you posted."
+        elif operation.action == "update":
+            job = owned_jobs[job_id]
+            saved_category_ids.setdefault(job_id, job.category_id)
+            for field, value in operation.job.model_dump(exclude={"id"}).items():
+                if value is not None:
+                    setattr(job, field, value)
+            job.updated_at = now
+            updated_jobs[job_id] = job
+            result.success = True
+        else:
+            deleted_job_ids.add(job_id)
+            result.success = True
+
+    updated_jobs_kept = [
+        job for id, job in updated_jobs.items() if id not in deleted_job_ids
+    ]
+
+    def save_jobs() -> list[Job]:
+        with transaction.atomic():
+            saved_jobs = Job.objects.bulk_create(created_jobs)
+            Job.objects.bulk_update(
+                updated_jobs_kept,
+                fields=[
+                    "category",
+                    "title",
+                    "type",
+                    "min_salary",
+                    "max_salary",
+                    "description",
+                    "is_available",
+                    "updated_at",
+                ],
+            )
+            bulk_saved.send(
+                sender=Job,
+                created=saved_jobs,
+                updated=updated_jobs_kept,
+                saved_category_ids=saved_category_ids,
+            )
+            if deleted_job_ids:
+                Job.bulk_delete(deleted_job_ids)
+                deleted_jobs = [owned_jobs[id] for id in deleted_job_ids]
+                for job in deleted_jobs:
+                    # Undo updates from this batch that were never saved
+                    job.category_id = saved_category_ids.get(job.id, job.category_id)
+                bulk_deleted.send(sender=Job, deleted=deleted_jobs)
+        return saved_jobs
+
+    created_jobs = await run_sync(save_jobs)
+
+    created_jobs_iter = iter(created_jobs)
+    for result in results:
+        if result.action == "create" and result.success:
+            result.id = next(created_jobs_iter).id
+    return BulkJobsFeedback(results=results)
+
+
 @router.get("/job/appliers/{id}", name="Get users who applied a specific job")
-def get_job_appliers(
+async def get_job_appliers(
     id: Annotated[int, Path(description="Job id")],
     user: Annotated[CustomUser, Depends(get_user)],
-    offset: Annotated[int, Query(description="Offset value")] = 0,
+    cursor: Annotated[
+        str, Query(description="Page cursor as returned in `next`")
+    ] = None,
+    offset: Annotated[
+        int,
+        Query(description="Offset value. Prefer `cursor` for deep pages", ge=0),
+    ] = 0,
     limit: Annotated[
         int, Query(description="Number of appliers not to exceed", ge=1, le=100)
     ] = 20,
+    with_total: Annotated[
+        bool, Query(description="Count all applicants of the job")
+    ] = True,
 ) -> JobApplicants:
-    """Get users who applied for a specific job"""
+    """Get users who applied for a specific job, latest applications first
+
+    Pages are keyed on `(applied_at, id)` of the application.
+    """
     try:
-        target_job = Job.objects.get(id=id)
-        if target_job.company.id != user.id:
+        target_job = await run_sync(Job.objects.get, id=id)
+        if target_job.company_id != user.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You can only view appliers for jobs you posted.",
             )
-        appliers: list[CustomUser] = target_job.applicants.all()
-        requested_appliers = appliers[offset : offset + limit]
-        return JobApplicants(
-            total=len(appliers),
-            applicants=[jsonable_encoder(applier) for applier in requested_appliers],
-        )
     except Job.DoesNotExist:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Job with id '{id}' does not exist.",
         )
 
+    applications = Application.objects.filter(job_id=id)
+    total_applicants = await run_sync(applications.count) if with_total else None
+    if cursor is not None:
+        applied_at, application_id, _ = decode_cursor(cursor)
+        applications = applications.filter(
+            Q(applied_at__lt=applied_at) | Q(id__lt=application_id),
+            applied_at__lte=applied_at,
+        )
+    applications = applications.select_related("user").order_by("-applied_at", "-id")
+
+    page = await run_sync(list, applications[offset : offset + limit + 1])
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1].applied_at, page[-1].id, "next")
+    applicants = [
+        JobApplicant(
+            **jsonable_encoder(application.user),
+            applied_at=application.applied_at,
+            status=application.status,
+        )
+        for application in page
+    ]
+    return JobApplicants(
+        total=total_applicants, applicants=applicants, next=next_cursor
+    )
+
 
 @router.get("/company/{id}", name="Get company details")
-def get_company_details(id: Annotated[int, Path(description="Company id")]):
+@cache_response("company:{id}")
+async def get_company_details(id: Annotated[int, Path(description="Company id")]):
     """Get details about a specific company"""
     try:
-        user = CustomUser.objects.get(id=id)
+        user = await run_sync(CustomUser.objects.get, id=id)
         return CompanyDetails(**jsonable_encoder(user))
     except CustomUser.DoesNotExist:
         raise HTTPException(
@@ -323,7 +617,7 @@ def get_company_details(id: Annotated[int, Path(description="Company id")]):
 
 
 @router.get("/user/details", name="Get details about current user")
-def get_user_details(
+async def get_user_details(
     user: Annotated[CustomUser, Depends(get_user)]
 ) -> CompleteApplicantDetails:
     """Get details about the current user"""
@@ -331,55 +625,117 @@ def get_user_details(
 
 
 @router.post("/user/apply/{id}", name="Apply for a specific job")
-def apply_specific_job(
+async def apply_specific_job(
     id: Annotated[int, Path(description="Job id")],
     user: Annotated[CustomUser, Depends(get_user)],
 ) -> Feedback:
-    """Apply for a job"""
-    try:
-        target_job = Job.objects.get(id=id)
-        user.jobs_applied.add(target_job)
-        user.save()
+    """Apply for a job. Applying again leaves the application as it is"""
+    if await run_sync(Application.apply, user.id, [id]):
         return Feedback(detail="Job applied successfully")
-    except Job.DoesNotExist:
-        raise HTTPException(status_code=404, detail=f"There is no job with id '{id}'")
+    elif await run_sync(Job.objects.filter(id=id).exists):
+        return Feedback(detail="Job already applied")
+    raise HTTPException(status_code=404, detail=f"There is no job with id '{id}'")
+
+
+@router.post("/user/apply", name="Apply for many jobs")
+async def apply_many_jobs(
+    bulk_apply: BulkApply, user: Annotated[CustomUser, Depends(get_user)]
+) -> BulkApplyFeedback:
+    """Apply for several jobs at once. Jobs applied before are left as they are"""
+    job_ids = list(dict.fromkeys(bulk_apply.job_ids))
+    applied = await run_sync(Application.apply, user.id, job_ids)
+    existing = set()
+    if len(applied) < len(job_ids):
+        existing = await run_sync(
+            set,
+            Job.objects.filter(
+                id__in=[id for id in job_ids if id not in applied]
+            ).values_list("id", flat=True),
+        )
+    return BulkApplyFeedback(
+        applied=[id for id in job_ids if id in applied],
+        already_applied=[id for id in job_ids if id in existing],
+        not_found=[id for id in job_ids if id not in applied and id not in existing],
+    )
 
 
 @router.delete("/user/apply/{id}", name="Unapply a speficic job")
-def apply_specific_job(
+async def unapply_specific_job(
     id: Annotated[int, Path(description="Job id")],
     user: Annotated[CustomUser, Depends(get_user)],
 ) -> Feedback:
-    """Apply for a job"""
-    try:
-        target_job = Job.objects.get(id=id)
-        user.jobs_applied.remove(target_job)
-        user.save()
+    """Withdraw a job application. Withdrawing again has no effect"""
+    if await run_sync(Application.unapply, user.id, [id]) or (
+        await run_sync(Job.objects.filter(id=id).exists)
+    ):
         return Feedback(detail="Job unapplied successfully")
-    except Job.DoesNotExist:
-        raise HTTPException(status_code=404, detail=f"There is no job with id '{id}'")
+    raise HTTPException(status_code=404, detail=f"There is no job with id '{id}'")
 
 
 @router.get("/user/applied", name="Get jobs applied")
-def get_jobs_applied(
+async def get_jobs_applied(
     user: Annotated[CustomUser, Depends(get_user)],
     limit: Annotated[
         int, Query(description="Number of jobs not to exceed", ge=1, le=100)
     ] = 20,
 ) -> JobsAvailable:
     """Get jobs applied by the user"""
-    jobs_applied: list[Job] = user.jobs_applied.order_by("-updated_at").all()
-    total_jobs_applied = len(jobs_applied)
-    jobs_found = []
-    for count, job in enumerate(jobs_applied, start=1):
-        jobs_found.append(
-            JobResponse(
-                company_username=job.company.username,
-                category_name=job.category.name,
-                **jsonable_encoder(job),
-            )
+    jobs_applied = Job.objects.filter(applications__user=user).order_by(
+        "-applications__applied_at", "-applications__id"
+    )
+    return TrustedJSONResponse(
+        JobsAvailable(
+            total=await run_sync(jobs_applied.count),
+            jobs=await serialize_jobs(jobs_applied[:limit]),
         )
-        if count == limit:
-            break
+    )
+
 
-    return JobsAvailable(total=total_jobs_applied, jobs=jobs_found)
+@router.get("/user/recommendations", name="Get recommended jobs")
+async def get_recommended_jobs(
+    user: Annotated[CustomUser, Depends(get_user)],
+    limit: Annotated[
+        int, Query(description="Number of jobs not to exceed", ge=1, le=100)
+    ] = 20,
+) -> JobsAvailable:
+    """Get available jobs resembling the ones applied by the user, best match first
+
+    Recommendations stored by `python -m api recommend-jobs` are served until
+    the user applies for another job. Users yet to apply get the latest jobs,
+    as does everyone while the recommendations index first loads.
+    """
+    fresh_recommendations = Recommendation.objects.filter(user=user).exclude(
+        Exists(
+            Application.objects.filter(
+                user=user, applied_at__gt=OuterRef("computed_at")
+            )
+        )
+    )
+    jobs_found = await serialize_jobs(
+        filter_jobs_available()
+        .filter(recommendations__in=fresh_recommendations)
+        .order_by("-recommendations__score")[:limit]
+    )
+    if not jobs_found:
+        # NumPy is only loaded once recommendations are requested
+        from jobs import recommendations
+
+        # Extra candidates make up for jobs closed by other workers
+        job_ids = await run_sync(recommendations.recommend_job_ids, user.id, 2 * limit)
+        if job_ids:
+            jobs_by_id = {
+                job.id: job
+                for job in await serialize_jobs(
+                    filter_jobs_available().filter(id__in=job_ids)
+                )
+            }
+            await run_sync(
+                recommendations.job_index.discard,
+                [id for id in job_ids if id not in jobs_by_id],
+            )
+            jobs_found = [jobs_by_id[id] for id in job_ids if id in jobs_by_id][:limit]
+        else:
+            jobs_found = await serialize_jobs(
+                filter_jobs_available().order_by("-updated_at", "-id")[:limit]
+            )
+    return TrustedJSONResponse(JobsAvailable(jobs=jobs_found))
@@ -1,35 +1,276 @@
-"""Utilities fuctions for v1
-"""
+"""Utilities fuctions for v1"""
 
 import uuid
+import json
+import asyncio
+import contextvars
 import random
+import base64
+import binascii
+import csv
+import io
+from datetime import datetime
 from string import ascii_lowercase
-from api.v1.models import NewJob, UpdateJob
-from jobs.models import JobCategory
+from typing import AsyncIterator, Callable, Literal
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from api.v1.models import (
+    NewJob,
+    UpdateJob,
+    JobResponse,
+    JobFacets,
+    TypeFacet,
+    CategoryFacet,
+    SalaryFacet,
+)
+from jobs.models import Job, JobCategory, JobTypes
+from django.db.models import F, Q, QuerySet, Case, When, Value, Count
+from django.conf import settings
 from fastapi import HTTPException, status
 from functools import wraps
 
 token_id = "jbc_"
 
+db_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_EXECUTOR_WORKERS, thread_name_prefix="db"
+)
+
+# `run_sync` calls queued or running in `db_executor`, changed on the event
+# loop thread only
+db_executor_pending = 0
+
 
 def generate_token() -> str:
     """Generates api token"""
     return token_id + str(uuid.uuid4()).replace("-", random.choice(ascii_lowercase))
 
 
+job_response_fields = (
+    "id",
+    "company_id",
+    "category_id",
+    "title",
+    "type",
+    "min_salary",
+    "max_salary",
+    "updated_at",
+)
+
+job_response_expressions = {
+    "company_username": F("company__username"),
+    "category_name": F("category__name"),
+}
+
+
+def job_response_rows(jobs: QuerySet[Job], *extra_fields: str) -> QuerySet[dict]:
+    """Selects columns needed by `JobResponse` in a single joined query"""
+    return jobs.values(*job_response_fields, *extra_fields, **job_response_expressions)
+
+
+def serialize_job_rows(jobs: QuerySet[Job]) -> list[JobResponse]:
+    """Builds `JobResponse` items straight from database rows"""
+    return [JobResponse.model_construct(**row) for row in job_response_rows(jobs)]
+
+
+async def serialize_jobs(jobs: QuerySet[Job]) -> list[JobResponse]:
+    """`serialize_job_rows` run in `db_executor`"""
+    return await run_sync(serialize_job_rows, jobs)
+
+
+def filter_jobs_available(
+    type: Literal["Internship", "Full-time", "All"] = "All",
+    category_id: int = None,
+    user_id: int = None,
+    start: int = -1,
+) -> QuerySet[Job]:
+    """Available jobs narrowed down by the job listing filters"""
+    filter = {"is_available": True}
+    if start is not None and start > 0:
+        filter["id__gt"] = start
+    if type and type != "All":
+        filter["type__exact"] = type
+    if category_id is not None:
+        filter["category__id"] = category_id
+    if user_id is not None:
+        filter["company__id"] = user_id
+    return Job.objects.filter(**filter)
+
+
+def seek_jobs(
+    jobs: QuerySet[Job],
+    updated_at: datetime,
+    id: int,
+    direction: Literal["next", "prev"],
+) -> QuerySet[Job]:
+    """Jobs after the `(updated_at, id)` position in `direction`, ordered so
+    that the closest ones come first"""
+    # The leading range lets SQLite seek the `(updated_at, id)` indexes
+    if direction == "next":
+        return jobs.filter(
+            Q(updated_at__lt=updated_at) | Q(id__lt=id), updated_at__lte=updated_at
+        ).order_by("-updated_at", "-id")
+    return jobs.filter(
+        Q(updated_at__gt=updated_at) | Q(id__gt=id), updated_at__gte=updated_at
+    ).order_by("updated_at", "id")
+
+
+# Lower bounds of the minimum salary buckets counted by the jobs facets
+salary_facet_bounds = (0, 30_000, 60_000, 90_000, 120_000)
+
+
+async def count_job_facets(
+    type: Literal["Internship", "Full-time", "All"] = "All",
+    category_id: int = None,
+    user_id: int = None,
+    start: int = -1,
+) -> JobFacets:
+    """Counts available jobs per type, category and salary bucket from one
+    grouped query. Type and category counts leave out their own filter so
+    that the other choices keep their counts"""
+    salary_bucket = Case(
+        *(
+            When(min_salary__gte=bound, then=Value(index))
+            for index, bound in reversed(list(enumerate(salary_facet_bounds)))
+        ),
+        default=Value(0),
+    )
+    groups = (
+        filter_jobs_available("All", None, user_id, start)
+        .values("type", "category_id", "category__name", salary_bucket=salary_bucket)
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    total = 0
+    types = {job_type.value: 0 for job_type in JobTypes}
+    categories: dict[int, CategoryFacet] = {}
+    salaries = [0] * len(salary_facet_bounds)
+    for group in await run_sync(list, groups):
+        type_matches = type in (None, "All") or group["type"] == type
+        category_matches = category_id is None or group["category_id"] == category_id
+        if category_matches:
+            types[group["type"]] = types.get(group["type"], 0) + group["count"]
+        if type_matches:
+            if group["category_id"] not in categories:
+                categories[group["category_id"]] = CategoryFacet.model_construct(
+                    id=group["category_id"], name=group["category__name"], count=0
+                )
+            categories[group["category_id"]].count += group["count"]
+        if type_matches and category_matches:
+            total += group["count"]
+            salaries[group["salary_bucket"]] += group["count"]
+    return JobFacets.model_construct(
+        total=total,
+        types=[
+            TypeFacet.model_construct(type=job_type, count=count)
+            for job_type, count in types.items()
+        ],
+        categories=sorted(
+            categories.values(), key=lambda category: (-category.count, category.name)
+        ),
+        salaries=[
+            SalaryFacet.model_construct(
+                min_salary=bound,
+                max_salary=(
+                    salary_facet_bounds[index + 1]
+                    if index + 1 < len(salary_facet_bounds)
+                    else None
+                ),
+                count=salaries[index],
+            )
+            for index, bound in enumerate(salary_facet_bounds)
+        ],
+    )
+
+
+async def export_jobs(
+    jobs: QuerySet[Job], format: Literal["ndjson", "csv"]
+) -> AsyncIterator[bytes]:
+    """Encodes `JobResponse` rows of `jobs`, latest updated first, a database
+    chunk at a time.
+
+    Each chunk is its own keyset query so no statement, and with it no
+    SQLite read lock, stays open while the client takes its time reading.
+    """
+    chunk_size = settings.JOBS_EXPORT_CHUNK_SIZE
+    buffer = io.StringIO()
+    if format == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=tuple(JobResponse.model_fields))
+        writer.writeheader()
+    chunk = jobs.order_by("-updated_at", "-id")
+    while True:
+        rows = await run_sync(list, job_response_rows(chunk[:chunk_size]))
+        if rows:
+            last_updated_at, last_id = rows[-1]["updated_at"], rows[-1]["id"]
+        for row in rows:
+            row["updated_at"] = row["updated_at"].isoformat()
+            if format == "csv":
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(row))
+                buffer.write("\n")
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if len(rows) < chunk_size:
+            break
+        chunk = seek_jobs(jobs, last_updated_at, last_id, "next")
+
+
+async def run_sync(func: Callable, *args, **kwargs):
+    """Runs blocking `func` in the sized `db_executor`.
+
+    Routes read through it instead of the async ORM, which runs every query
+    on asgiref's single thread-sensitive thread and so serialises them.
+    """
+    global db_executor_pending
+    context = contextvars.copy_context()
+    db_executor_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            db_executor, partial(context.run, func, *args, **kwargs)
+        )
+    finally:
+        db_executor_pending -= 1
+
+
 def validate_category_id(func):
     """Decorator that ensures category_id specified actually exists"""
 
     @wraps(func)
-    def decorator(job_details: NewJob | UpdateJob, **kwargs):
-        try:
-            if job_details.category_id is not None:
-                JobCategory.objects.get(id=job_details.category_id)
-            return func(job_details, **kwargs)
-        except JobCategory.DoesNotExist:
+    async def decorator(job_details: NewJob | UpdateJob, **kwargs):
+        if job_details.category_id is not None and not (
+            await run_sync(
+                JobCategory.objects.filter(id=job_details.category_id).exists
+            )
+        ):
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail=f"Job category specified '{job_details.category_id}' does not exist.",
             )
+        return await func(job_details, **kwargs)
 
     return decorator
+
+
+def encode_cursor(
+    updated_at: datetime, id: int, direction: Literal["next", "prev"]
+) -> str:
+    """Makes opaque pagination cursor pointing at a `(updated_at, id)` position"""
+    payload = json.dumps([updated_at.isoformat(), id, direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int, Literal["next", "prev"]]:
+    """Reverses `encode_cursor`"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, id, direction = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(updated_at), int(id), direction
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid pagination cursor '{cursor}'.",
+        )
@@ -1,12 +1,13 @@
 from django.contrib import admin
-from jobs.models import JobCategory, Job
+from jobs.models import JobCategory, Job, Application, Recommendation
+from jobs import search
 
 # Register your models here.
 
 
 @admin.register(JobCategory)
 class JobCategoryAdmin(admin.ModelAdmin):
-    list_display = ["name", "created_on"]
+    list_display = ["name", "jobs_amount", "created_on"]
     search_fields = ["name"]
     list_filter = ["created_on"]
     ordering = ["-created_on"]
@@ -31,3 +32,27 @@ class JobAdmin(admin.ModelAdmin):
         "updated_at",
     ]
     ordering = ["-updated_at"]
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.is_supported():
+            return super().get_search_results(request, queryset, search_term)
+        job_ids = search.match_job_ids(search_term)
+        if job_ids is None:
+            return queryset.none(), False
+        return queryset.filter(id__in=job_ids), False
+
+
+@admin.register(Application)
+class ApplicationAdmin(admin.ModelAdmin):
+    list_display = ["user", "job", "status", "applied_at"]
+    list_filter = ["status", "applied_at"]
+    raw_id_fields = ["user", "job"]
+    ordering = ["-applied_at"]
+
+
+@admin.register(Recommendation)
+class RecommendationAdmin(admin.ModelAdmin):
+    list_display = ["user", "job", "score", "computed_at"]
+    list_filter = ["computed_at"]
+    raw_id_fields = ["user", "job"]
+    ordering = ["user", "-score"]
@@ -0,0 +1,222 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Application",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("Pending", "Pending"),
+                            ("Reviewed", "Reviewed"),
+                            ("Accepted", "Accepted"),
+                            ("Rejected", "Rejected"),
+                        ],
+                        default="Pending",
+                        help_text="Progress of the application",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "applied_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Date when the user applied for the job",
+                        verbose_name="Applied at",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Application",
+                "verbose_name_plural": "Applications",
+            },
+        ),
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "title",
+                    models.CharField(
+                        help_text="Job title", max_length=100, verbose_name="title"
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("Full-time", "Full-time"),
+                            ("Internship", "Internship"),
+                        ],
+                        default="Full-time",
+                        help_text="Can either be Intership or Full-time",
+                        max_length=30,
+                        verbose_name="type",
+                    ),
+                ),
+                (
+                    "min_salary",
+                    models.PositiveIntegerField(
+                        help_text="The least possible pay",
+                        verbose_name="minimum salary",
+                    ),
+                ),
+                (
+                    "max_salary",
+                    models.PositiveIntegerField(
+                        help_text="The highest possible pay",
+                        verbose_name="maximum salary",
+                    ),
+                ),
+                (
+                    "description",
+                    models.TextField(
+                        help_text="Job description in details",
+                        verbose_name="description",
+                    ),
+                ),
+                (
+                    "is_available",
+                    models.BooleanField(
+                        default=True,
+                        help_text="Job availability status",
+                        verbose_name="Is available",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Last time to be modified",
+                        verbose_name="Updated at",
+                    ),
+                ),
+                (
+                    "created_on",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Date when the job was initially added",
+                        verbose_name="Date created",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Job",
+                "verbose_name_plural": "Jobs",
+            },
+        ),
+        migrations.CreateModel(
+            name="JobCategory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Job category name",
+                        max_length=100,
+                        unique=True,
+                        verbose_name="name",
+                    ),
+                ),
+                (
+                    "description",
+                    models.TextField(
+                        blank=True,
+                        help_text="All about the category",
+                        null=True,
+                        verbose_name="description",
+                    ),
+                ),
+                (
+                    "created_on",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Time it firstly made entry",
+                        verbose_name="date created",
+                    ),
+                ),
+                (
+                    "jobs_amount",
+                    models.PositiveIntegerField(
+                        default=0,
+                        editable=False,
+                        help_text="Number of jobs under this category",
+                        verbose_name="jobs amount",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Category",
+                "verbose_name_plural": "Categories",
+            },
+        ),
+        migrations.CreateModel(
+            name="Recommendation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "score",
+                    models.FloatField(
+                        help_text="Similarity of the job to the user's applications",
+                        verbose_name="score",
+                    ),
+                ),
+                (
+                    "computed_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Date when the recommendation was made",
+                        verbose_name="Computed at",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Recommendation",
+                "verbose_name_plural": "Recommendations",
+            },
+        ),
+    ]
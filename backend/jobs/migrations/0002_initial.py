@@ -0,0 +1,155 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("jobs", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="application",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="applications",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Applicant",
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="applicants",
+            field=models.ManyToManyField(
+                blank=True,
+                help_text="Users who have applied for the job",
+                related_name="jobs_applied",
+                through="jobs.Application",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Applicants",
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="company",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="jobs",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="application",
+            name="job",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="applications",
+                to="jobs.job",
+                verbose_name="Job",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobcategory",
+            index=models.Index(fields=["-created_on"], name="category_created_idx"),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="category",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="jobs",
+                to="jobs.jobcategory",
+                verbose_name="Category",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recommendation",
+            name="job",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="recommendations",
+                to="jobs.job",
+                verbose_name="Job",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recommendation",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="recommendations",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="User",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["job", "-applied_at", "-id"], name="application_job_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["user", "-applied_at", "-id"], name="application_user_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="application",
+            constraint=models.UniqueConstraint(
+                fields=("user", "job"), name="unique_job_application"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("is_available", True)),
+                fields=["-updated_at", "-id"],
+                name="job_available_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("is_available", True)),
+                fields=["type", "-updated_at", "-id"],
+                name="job_type_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("is_available", True)),
+                fields=["category", "-updated_at", "-id"],
+                name="job_category_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("is_available", True)),
+                fields=["company", "-updated_at", "-id"],
+                name="job_company_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recommendation",
+            index=models.Index(
+                fields=["user", "-score"], name="recommendation_user_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recommendation",
+            constraint=models.UniqueConstraint(
+                fields=("user", "job"), name="unique_job_recommendation"
+            ),
+        ),
+    ]
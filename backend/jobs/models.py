@@ -1,5 +1,9 @@
-from django.db import models
+from django.db import models, connection, DEFAULT_DB_ALIAS
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.translation import gettext as _
+from typing import Iterable
 from enum import Enum
 
 # Create your models here.
@@ -10,6 +14,13 @@ class JobTypes(str, Enum):
     INTERNSHIP = _("Internship")
 
 
+class ApplicationStatus(str, Enum):
+    PENDING = _("Pending")
+    REVIEWED = _("Reviewed")
+    ACCEPTED = _("Accepted")
+    REJECTED = _("Rejected")
+
+
 class JobCategory(models.Model):
     name = models.CharField(
         _("name"),
@@ -30,13 +41,39 @@ class JobCategory(models.Model):
         _("date created"), auto_now_add=True, help_text=_("Time it firstly made entry")
     )
 
+    jobs_amount = models.PositiveIntegerField(
+        _("jobs amount"),
+        help_text=_("Number of jobs under this category"),
+        default=0,
+        editable=False,
+    )
+
     class Meta:
         verbose_name = _("Category")
         verbose_name_plural = _("Categories")
+        indexes = [
+            models.Index(fields=["-created_on"], name="category_created_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def rebuild_jobs_amount(cls, using: str = DEFAULT_DB_ALIAS) -> int:
+        """Recounts jobs of every category in a single statement.
+        Returns number of categories updated"""
+        jobs_count = (
+            Job.objects.using(using)
+            .filter(category=OuterRef("pk"))
+            .order_by()
+            .values("category")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return cls.objects.using(using).update(
+            jobs_amount=Coalesce(Subquery(jobs_count), 0)
+        )
+
 
 class Job(models.Model):
     company = models.ForeignKey(
@@ -97,9 +134,192 @@ class Job(models.Model):
         auto_now_add=True,
     )
 
+    applicants = models.ManyToManyField(
+        "users.CustomUser",
+        verbose_name=_("Applicants"),
+        help_text=_("Users who have applied for the job"),
+        through="Application",
+        related_name="jobs_applied",
+        blank=True,
+    )
+
     class Meta:
         verbose_name = _("Job")
         verbose_name_plural = _("Jobs")
+        # Listings only show available jobs, filter on at most one of
+        # type, category or company and order by latest update
+        indexes = [
+            models.Index(
+                fields=["-updated_at", "-id"],
+                condition=models.Q(is_available=True),
+                name="job_available_updated_idx",
+            ),
+            models.Index(
+                fields=["type", "-updated_at", "-id"],
+                condition=models.Q(is_available=True),
+                name="job_type_updated_idx",
+            ),
+            models.Index(
+                fields=["category", "-updated_at", "-id"],
+                condition=models.Q(is_available=True),
+                name="job_category_updated_idx",
+            ),
+            models.Index(
+                fields=["company", "-updated_at", "-id"],
+                condition=models.Q(is_available=True),
+                name="job_company_updated_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title + " - " + self.company.username or self.company.first_name
+
+    @classmethod
+    def bulk_delete(cls, job_ids: Iterable[int]) -> int:
+        """Deletes jobs with their applications and recommendations in one
+        statement per table. Meant to run in a transaction and, like
+        `bulk_create`, sends no `post_delete` so callers send
+        `jobs.signals.bulk_deleted` instead. Returns number of jobs deleted"""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(job_ids))
+        with connection.cursor() as cursor:
+            for model in (Application, Recommendation):
+                cursor.execute(
+                    f"DELETE FROM {model._meta.db_table} "
+                    f"WHERE job_id IN ({placeholders})",
+                    job_ids,
+                )
+            cursor.execute(
+                f"DELETE FROM {cls._meta.db_table} WHERE id IN ({placeholders})",
+                job_ids,
+            )
+            return cursor.rowcount
+
+
+class Application(models.Model):
+    user = models.ForeignKey(
+        "users.CustomUser",
+        verbose_name=_("Applicant"),
+        on_delete=models.CASCADE,
+        related_name="applications",
+    )
+    job = models.ForeignKey(
+        Job,
+        verbose_name=_("Job"),
+        on_delete=models.CASCADE,
+        related_name="applications",
+    )
+    status = models.CharField(
+        _("status"),
+        help_text=_("Progress of the application"),
+        choices=(
+            ["Pending", ApplicationStatus.PENDING.value],
+            ["Reviewed", ApplicationStatus.REVIEWED.value],
+            ["Accepted", ApplicationStatus.ACCEPTED.value],
+            ["Rejected", ApplicationStatus.REJECTED.value],
+        ),
+        default=ApplicationStatus.PENDING.value,
+        max_length=20,
+    )
+    applied_at = models.DateTimeField(
+        _("Applied at"),
+        help_text=_("Date when the user applied for the job"),
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = _("Application")
+        verbose_name_plural = _("Applications")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "job"], name="unique_job_application"
+            ),
+        ]
+        # Applicants of a job and jobs applied by a user, latest first
+        indexes = [
+            models.Index(
+                fields=["job", "-applied_at", "-id"], name="application_job_idx"
+            ),
+            models.Index(
+                fields=["user", "-applied_at", "-id"], name="application_user_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.job}"
+
+    @classmethod
+    def apply(cls, user_id: int, job_ids: Iterable[int]) -> set[int]:
+        """Applies user for the existing jobs among `job_ids` in a single
+        statement, leaving current applications untouched. Returns ids of
+        the jobs applied"""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return set()
+        applied_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {cls._meta.db_table} "
+                f"(user_id, job_id, status, applied_at) "
+                f"SELECT %s, id, %s, %s FROM {Job._meta.db_table} "
+                f"WHERE id IN ({', '.join(['%s'] * len(job_ids))}) "
+                f"ON CONFLICT (user_id, job_id) DO NOTHING RETURNING job_id",
+                [user_id, ApplicationStatus.PENDING.value, applied_at, *job_ids],
+            )
+            return {job_id for (job_id,) in cursor.fetchall()}
+
+    @classmethod
+    def unapply(cls, user_id: int, job_ids: Iterable[int]) -> int:
+        """Withdraws user's applications for `job_ids` in a single statement.
+        Returns number of applications withdrawn"""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {cls._meta.db_table} WHERE user_id = %s "
+                f"AND job_id IN ({', '.join(['%s'] * len(job_ids))})",
+                [user_id, *job_ids],
+            )
+            return cursor.rowcount
+
+
+class Recommendation(models.Model):
+    user = models.ForeignKey(
+        "users.CustomUser",
+        verbose_name=_("User"),
+        on_delete=models.CASCADE,
+        related_name="recommendations",
+    )
+    job = models.ForeignKey(
+        Job,
+        verbose_name=_("Job"),
+        on_delete=models.CASCADE,
+        related_name="recommendations",
+    )
+    score = models.FloatField(
+        _("score"), help_text=_("Similarity of the job to the user's applications")
+    )
+    computed_at = models.DateTimeField(
+        _("Computed at"),
+        help_text=_("Date when the recommendation was made"),
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = _("Recommendation")
+        verbose_name_plural = _("Recommendations")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "job"], name="unique_job_recommendation"
+            ),
+        ]
+        # Best recommendations of a user first
+        indexes = [
+            models.Index(fields=["user", "-score"], name="recommendation_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.job}"
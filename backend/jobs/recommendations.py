@@ -0,0 +1,424 @@
+"""Content-based job recommendations scored with NumPy.
+
+Every available job is reduced to a facet code, combining its category,
+type and salary band, and a short signed hashed vector of its title and
+description terms. `JobIndex` keeps both in arrays so that ranking all open
+jobs against a profile of a user's latest applications is one matrix-vector
+product plus one table lookup.
+
+The index is loaded in the background on first use and then kept current
+by the receivers below. Writes made by other workers are picked up every
+`RECOMMENDATIONS_SYNC_INTERVAL` seconds. `recommend_all` precomputes top
+jobs for every active user across a process pool and stores them as
+`Recommendation` entries.
+
+NumPy is imported with this module, so import it only where
+recommendations are actually needed.
+"""
+
+import os
+import re
+import math
+import time
+import zlib
+import threading
+from datetime import timedelta
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+from jobs.models import Job, Application, Recommendation
+from jobs.signals import bulk_saved, bulk_deleted
+
+job_types = ("Full-time", "Internship")
+
+# Half-octave bands of the salary midpoint. 64 bands reach past 4 billion
+salary_bands = 64
+
+facets_per_category = len(job_types) * salary_bands
+
+# Row of a 500k jobs matrix is read per score so its width bounds latency
+term_dimensions = 32
+
+title_term_weight = 3.0
+
+category_weight = 0.35
+type_weight = 0.1
+salary_weight = 0.2
+terms_weight = 0.35
+
+# Applications considered when profiling a user, latest first
+history_size = 50
+
+# Writes committed this long after their `updated_at` are still picked up
+sync_overlap = timedelta(seconds=60)
+
+term_pattern = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+
+feature_fields = (
+    "id",
+    "category_id",
+    "type",
+    "min_salary",
+    "max_salary",
+    "title",
+    "description",
+)
+
+
+def salary_band(min_salary: int, max_salary: int) -> int:
+    midpoint = max((min_salary + max_salary) / 2, 1)
+    return min(int(2 * math.log2(midpoint)), salary_bands - 1)
+
+
+@lru_cache(maxsize=65536)
+def term_column(term: str) -> int:
+    """Stable column of a term among `2 * term_dimensions` columns. The
+    upper half is folded onto the lower one with a negative sign"""
+    return zlib.crc32(term.encode()) % (2 * term_dimensions)
+
+
+def term_vectors(texts: Iterable[tuple[str, str]]) -> np.ndarray:
+    """Unit length signed hashed term counts of `(title, description)`
+    pairs, title terms weighing more"""
+    columns: list[int] = []
+    weights: list[float] = []
+    documents = 0
+    for title, description in texts:
+        offset = documents * 2 * term_dimensions
+        for text, weight in ((title, title_term_weight), (description, 1.0)):
+            terms = term_pattern.findall(text.lower())
+            columns.extend(offset + column for column in map(term_column, terms))
+            weights.extend([weight] * len(terms))
+        documents += 1
+    counts = np.bincount(
+        columns, weights=weights, minlength=documents * 2 * term_dimensions
+    ).reshape(documents, 2, term_dimensions)
+    vectors = (counts[:, 0] - counts[:, 1]).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+
+class JobIndex:
+    """Feature arrays of available jobs.
+
+    Rows of removed jobs are reused. Their facet code is 0, which belongs
+    to a reserved category slot that always scores `-inf`.
+    """
+
+    def __init__(self, sync_interval: float, capacity: int = 1024):
+        self.sync_interval = sync_interval
+        self.loaded = False
+        self.synced_at = None
+        self.size = 0
+        self._next_sync = 0.0
+        self._ids = np.zeros(capacity, np.int64)
+        self._codes = np.zeros(capacity, np.int32)
+        self._terms = np.zeros((capacity, term_dimensions), np.float32)
+        self._rows: dict[int, int] = {}
+        self._free_rows: list[int] = []
+        self._category_slots: dict[int, int] = {}
+        self._lock = threading.RLock()
+        self._loader: threading.Thread = None
+        self._loader_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _category_slot(self, category_id: int) -> int:
+        slot = self._category_slots.get(category_id)
+        if slot is None:
+            slot = self._category_slots[category_id] = len(self._category_slots) + 1
+        return slot
+
+    def _facet_code(
+        self, category_id: int, type: str, min_salary: int, max_salary: int
+    ) -> int:
+        type_index = job_types.index(type) if type in job_types else 0
+        return (
+            self._category_slot(category_id) * facets_per_category
+            + type_index * salary_bands
+            + salary_band(min_salary, max_salary)
+        )
+
+    def _grow(self):
+        capacity = len(self._ids) * 2
+        ids = np.zeros(capacity, np.int64)
+        codes = np.zeros(capacity, np.int32)
+        terms = np.zeros((capacity, term_dimensions), np.float32)
+        ids[: self.size] = self._ids[: self.size]
+        codes[: self.size] = self._codes[: self.size]
+        terms[: self.size] = self._terms[: self.size]
+        self._ids, self._codes, self._terms = ids, codes, terms
+
+    def _row(self, id: int) -> int:
+        row = self._rows.get(id)
+        if row is None:
+            if self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                if self.size == len(self._ids):
+                    self._grow()
+                row = self.size
+                self.size += 1
+            self._rows[id] = row
+        return row
+
+    def _add(self, rows: Iterable[tuple], chunk_size: int = 2048):
+        rows = iter(rows)
+        while chunk := list(islice(rows, chunk_size)):
+            positions = [self._row(row[0]) for row in chunk]
+            self._ids[positions] = [row[0] for row in chunk]
+            self._codes[positions] = [self._facet_code(*row[1:5]) for row in chunk]
+            self._terms[positions] = term_vectors(row[5:] for row in chunk)
+
+    def _remove(self, ids: Iterable[int]):
+        for id in ids:
+            row = self._rows.pop(id, None)
+            if row is not None:
+                self._ids[row] = 0
+                self._codes[row] = 0
+                self._terms[row] = 0
+                self._free_rows.append(row)
+
+    def update(self, jobs: Iterable[Job]):
+        """Adds or refreshes available jobs and drops the rest. Ignored until
+        the index is loaded as loading reads them anyway"""
+        if not self.loaded:
+            return
+        with self._lock:
+            jobs = list(jobs)
+            self._remove(job.id for job in jobs if not job.is_available)
+            self._add(
+                tuple(getattr(job, field) for field in feature_fields)
+                for job in jobs
+                if job.is_available
+            )
+
+    def discard(self, ids: Iterable[int]):
+        """Drops jobs e.g when found deleted or unavailable"""
+        with self._lock:
+            self._remove(ids)
+
+    def load(self):
+        """Reads all available jobs"""
+        with self._lock:
+            synced_at = timezone.now()
+            self._rows.clear()
+            self._free_rows.clear()
+            self.size = 0
+            self._add(
+                Job.objects.filter(is_available=True)
+                .values_list(*feature_fields)
+                .iterator(chunk_size=settings.JOBS_EXPORT_CHUNK_SIZE)
+            )
+            self.synced_at = synced_at
+            self.loaded = True
+            self._next_sync = time.monotonic() + self.sync_interval
+
+    def _load_in_background(self):
+        try:
+            self.load()
+        finally:
+            self._loader = None
+            connection.close()
+
+    def sync(self) -> bool:
+        """Reads jobs updated since the last sync once `sync_interval` has
+        elapsed. Returns False while the index is yet to be loaded, loading
+        it in the background"""
+        if not self.loaded:
+            with self._loader_lock:
+                if self._loader is None:
+                    self._loader = threading.Thread(
+                        target=self._load_in_background, name="job-index", daemon=True
+                    )
+                    self._loader.start()
+            return False
+        if time.monotonic() < self._next_sync:
+            return True
+        with self._lock:
+            if time.monotonic() < self._next_sync:
+                return True
+            synced_at = timezone.now()
+            self._add(
+                Job.objects.filter(
+                    is_available=True, updated_at__gte=self.synced_at - sync_overlap
+                ).values_list(*feature_fields)
+            )
+            self.synced_at = synced_at
+            self._next_sync = time.monotonic() + self.sync_interval
+        return True
+
+    def _profile(self, history: list[tuple]) -> tuple[np.ndarray, np.ndarray]:
+        """Score per facet code and term weights of a user's applied jobs"""
+        categories = np.zeros(len(self._category_slots) + 1, np.float32)
+        types = np.zeros(len(job_types), np.float32)
+        bands = np.zeros(salary_bands, np.float32)
+        for _, category_id, type, min_salary, max_salary, title, description in history:
+            slot = self._category_slots.get(category_id)
+            if slot is not None:
+                categories[slot] += 1
+            types[job_types.index(type) if type in job_types else 0] += 1
+            bands[salary_band(min_salary, max_salary)] += 1
+        categories /= len(history)
+        types /= len(history)
+        # Neighbouring salary bands count as partial matches
+        bands = np.minimum(
+            np.convolve(bands, [0.25, 0.5, 1.0, 0.5, 0.25], mode="same") / len(history),
+            1.0,
+        )
+        terms = term_vectors(row[5:] for row in history).sum(axis=0)
+        norm = np.linalg.norm(terms)
+        if norm:
+            terms *= terms_weight / norm
+        facet_scores = (
+            category_weight * categories[:, None, None]
+            + type_weight * types[None, :, None]
+            + salary_weight * bands[None, None, :]
+        ).reshape(-1)
+        facet_scores[:facets_per_category] = -np.inf
+        return facet_scores, terms
+
+    def rank(
+        self, history: list[tuple], count: int, exclude: Iterable[int] = ()
+    ) -> list[tuple[int, float]]:
+        """`(job id, score)` of the `count` jobs most similar to the
+        `feature_fields` rows in `history`, best first"""
+        with self._lock:
+            if not history or not self._rows:
+                return []
+            facet_scores, terms = self._profile(history)
+            scores = self._terms[: self.size] @ terms
+            scores += facet_scores.take(self._codes[: self.size])
+            for id in exclude:
+                row = self._rows.get(id)
+                if row is not None:
+                    scores[row] = -np.inf
+            count = min(count, self.size)
+            top = np.argpartition(scores, -count)[-count:]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                (int(self._ids[row]), float(scores[row]))
+                for row in top
+                if scores[row] > -np.inf
+            ]
+
+
+job_index = JobIndex(sync_interval=settings.RECOMMENDATIONS_SYNC_INTERVAL)
+
+
+def application_history(user_id: int) -> tuple[list[int], list[tuple]]:
+    """Ids of all jobs applied by user, latest first, and `feature_fields`
+    rows of the latest `history_size` of them"""
+    applied_ids = list(
+        Application.objects.filter(user_id=user_id)
+        .order_by("-applied_at", "-id")
+        .values_list("job_id", flat=True)
+    )
+    history = list(
+        Job.objects.filter(id__in=applied_ids[:history_size]).values_list(
+            *feature_fields
+        )
+    )
+    return applied_ids, history
+
+
+def recommend_job_ids(user_id: int, count: int) -> list[int]:
+    """Ids of available jobs most similar to the ones user applied for, best
+    first. Empty when user has not applied for any or the index is loading"""
+    if not job_index.sync():
+        return []
+    applied_ids, history = application_history(user_id)
+    return [id for id, _ in job_index.rank(history, count, exclude=applied_ids)]
+
+
+def init_worker(settings_module: str):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup()
+    job_index.load()
+
+
+def recommend_users(user_ids: list[int], count: int) -> list[tuple[int, list]]:
+    """Top `(job id, score)` pairs of each user"""
+    recommendations = []
+    for user_id in user_ids:
+        applied_ids, history = application_history(user_id)
+        recommendations.append(
+            (user_id, job_index.rank(history, count, exclude=applied_ids))
+        )
+    return recommendations
+
+
+def store_recommendations(results: Iterable[list[tuple[int, list]]]):
+    for recommendations in results:
+        with transaction.atomic():
+            Recommendation.objects.filter(
+                user_id__in=[user_id for user_id, _ in recommendations]
+            ).delete()
+            Recommendation.objects.bulk_create(
+                Recommendation(user_id=user_id, job_id=job_id, score=score)
+                for user_id, ranked in recommendations
+                for job_id, score in ranked
+            )
+
+
+def recommend_all(count: int, active_days: int, workers: int) -> int:
+    """Replaces stored recommendations of users who applied in the last
+    `active_days` days with their top `count` jobs, scored across `workers`
+    processes. Returns number of users updated"""
+    user_ids = list(
+        Application.objects.filter(
+            applied_at__gte=timezone.now() - timedelta(days=active_days)
+        )
+        .order_by()
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+    chunks = [user_ids[index : index + 100] for index in range(0, len(user_ids), 100)]
+    if workers == 1:
+        job_index.load()
+        store_recommendations(recommend_users(chunk, count) for chunk in chunks)
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(os.environ["DJANGO_SETTINGS_MODULE"],),
+        ) as executor:
+            store_recommendations(
+                executor.map(recommend_users, chunks, [count] * len(chunks))
+            )
+    return len(user_ids)
+
+
+def update_saved_job(sender, instance: Job, raw: bool = False, **kwargs):
+    if not raw:
+        job_index.update([instance])
+
+
+def update_bulk_saved_jobs(sender, created: list[Job], updated: list[Job], **kwargs):
+    job_index.update(created + updated)
+
+
+def discard_deleted_job(sender, instance: Job, **kwargs):
+    job_index.discard([instance.id])
+
+
+def discard_bulk_deleted_jobs(sender, deleted: list[Job], **kwargs):
+    job_index.discard([job.id for job in deleted])
+
+
+post_save.connect(update_saved_job, sender=Job)
+bulk_saved.connect(update_bulk_saved_jobs, sender=Job)
+post_delete.connect(discard_deleted_job, sender=Job)
+bulk_deleted.connect(discard_bulk_deleted_jobs, sender=Job)
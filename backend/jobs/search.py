@@ -0,0 +1,133 @@
+"""Full-text search over jobs backed by an SQLite FTS5 table.
+
+The index lives in `jobs_job_fts` whose rowid is the job id. It is created
+and filled with existing jobs after `migrate`, kept in sync by
+`jobs.signals` and can be rebuilt from scratch with
+`python -m api rebuild-search-index`.
+"""
+
+import re
+from typing import Iterable
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+fts_table = "jobs_job_fts"
+
+title_weight = 10.0
+description_weight = 1.0
+
+search_term_pattern = re.compile(r"\w+", re.UNICODE)
+
+
+def is_supported() -> bool:
+    return connection.vendor == "sqlite"
+
+
+def create_search_index() -> bool:
+    """Creates the FTS5 table if missing. Returns whether it was created"""
+    if not is_supported():
+        return False
+    with connection.cursor() as cursor:
+        if fts_table in connection.introspection.table_names(cursor):
+            return False
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {fts_table} "
+            "USING fts5(title, description, tokenize='porter unicode61')"
+        )
+    return True
+
+
+def index_job(id: int, title: str, description: str):
+    """Adds or refreshes a job entry in the index"""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {fts_table}(rowid, title, description) "
+            "VALUES (%s, %s, %s)",
+            [id, title, description],
+        )
+
+
+def index_jobs(jobs: Iterable[tuple[int, str, str]]):
+    """Adds or refreshes `(id, title, description)` entries in the index"""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {fts_table}(rowid, title, description) "
+            "VALUES (%s, %s, %s)",
+            list(jobs),
+        )
+
+
+def unindex_job(id: int):
+    """Removes a job entry from the index"""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {fts_table} WHERE rowid = %s", [id])
+
+
+def unindex_jobs(ids: Iterable[int]):
+    """Removes entries of many jobs from the index in a single statement"""
+    ids = list(ids)
+    if not ids or not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {fts_table} WHERE rowid IN ({', '.join(['%s'] * len(ids))})",
+            ids,
+        )
+
+
+def rebuild_search_index() -> int:
+    """Reindexes all jobs. Returns number of jobs indexed"""
+    if not is_supported():
+        return 0
+    create_search_index()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {fts_table}")
+        cursor.execute(
+            f"INSERT INTO {fts_table}(rowid, title, description) "
+            "SELECT id, title, description FROM jobs_job"
+        )
+        return cursor.rowcount
+
+
+def make_match_expression(query: str) -> str | None:
+    """Turns free text into an FTS5 expression matching all of its terms"""
+    terms = search_term_pattern.findall(query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def match_job_ids(query: str) -> RawSQL | None:
+    """Subquery of the ids of every job matching the query, for filtering
+    querysets with `id__in`"""
+    expression = make_match_expression(query)
+    if expression is None:
+        return None
+    return RawSQL(
+        f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s", [expression]
+    )
+
+
+def search_job_ids(
+    query: str, limit: int, offset: int = 0, available_only: bool = True
+) -> list[int]:
+    """Ids of jobs matching the query, best BM25 match first"""
+    expression = make_match_expression(query)
+    if expression is None or not is_supported():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {fts_table}.rowid FROM {fts_table} "
+            f"INNER JOIN jobs_job ON jobs_job.id = {fts_table}.rowid "
+            f"WHERE {fts_table} MATCH %s"
+            + (" AND jobs_job.is_available" if available_only else "")
+            + f" ORDER BY bm25({fts_table}, %s, %s) LIMIT %s OFFSET %s",
+            [expression, title_weight, description_weight, limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,217 @@
+"""Keeps data derived from `Job` entries in sync"""
+
+from django.db import connections
+from django.db.models import F, Case, When
+from django.db.models.signals import (
+    post_init,
+    post_save,
+    post_delete,
+    pre_migrate,
+    post_migrate,
+)
+from django.dispatch import receiver, Signal
+from django.utils import timezone
+from jobs.models import Job, JobCategory, Application
+from jobs import search
+
+# Auto-created table of the former `CustomUser.jobs_applied` relation.
+# Its rows are stashed before `migrate` drops it and then moved into
+# `Application` once that table exists.
+legacy_applications_table = "users_customuser_jobs_applied"
+stashed_applications_table = "jobs_legacy_application"
+
+# Databases whose job categories predate `JobCategory.jobs_amount`. Their
+# counters are recounted once `migrate` has added the column.
+outdated_jobs_amount: set[str] = set()
+
+# Sent after `bulk_create`/`bulk_update` of jobs since those skip model
+# signals. Arguments: `created` and `updated` lists of jobs plus
+# `saved_category_ids` mapping updated job ids to their former category id.
+bulk_saved = Signal()
+
+# Sent after `Job.bulk_delete` with the `deleted` jobs
+bulk_deleted = Signal()
+
+
+def decrease_jobs_amount(removed: dict[int, int]):
+    """Takes `removed` jobs off the amount of each category in a single
+    statement"""
+    JobCategory.objects.filter(id__in=removed).update(
+        jobs_amount=Case(
+            *(
+                When(
+                    id=category_id,
+                    jobs_amount__gte=amount,
+                    then=F("jobs_amount") - amount,
+                )
+                for category_id, amount in removed.items()
+            ),
+            default=F("jobs_amount"),
+            output_field=JobCategory._meta.get_field("jobs_amount"),
+        )
+    )
+
+
+def update_jobs_amount(category_id: int, change: int):
+    """Adjusts `JobCategory.jobs_amount` without loading the category"""
+    categories = JobCategory.objects.filter(id=category_id)
+    if change < 0:
+        categories = categories.filter(jobs_amount__gte=-change)
+    categories.update(jobs_amount=F("jobs_amount") + change)
+
+
+@receiver(post_init, sender=Job)
+def remember_job_category(sender, instance: Job, **kwargs):
+    instance._saved_category_id = (
+        instance.__dict__.get("category_id") if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Job)
+def count_saved_job(sender, instance: Job, created: bool, raw: bool = False, **kwargs):
+    if raw:
+        return
+    if created:
+        update_jobs_amount(instance.category_id, 1)
+    elif (
+        instance._saved_category_id is not None
+        and instance._saved_category_id != instance.category_id
+    ):
+        update_jobs_amount(instance._saved_category_id, -1)
+        update_jobs_amount(instance.category_id, 1)
+    instance._saved_category_id = instance.category_id
+
+
+@receiver(post_delete, sender=Job)
+def count_deleted_job(sender, instance: Job, **kwargs):
+    update_jobs_amount(instance.category_id, -1)
+
+
+@receiver(bulk_saved, sender=Job)
+def count_bulk_saved_jobs(
+    sender,
+    created: list[Job],
+    updated: list[Job],
+    saved_category_ids: dict[int, int],
+    **kwargs,
+):
+    changes: dict[int, int] = {}
+    for job in created:
+        changes[job.category_id] = changes.get(job.category_id, 0) + 1
+    for job in updated:
+        saved_category_id = saved_category_ids.get(job.id)
+        if saved_category_id is not None and saved_category_id != job.category_id:
+            changes[saved_category_id] = changes.get(saved_category_id, 0) - 1
+            changes[job.category_id] = changes.get(job.category_id, 0) + 1
+    for category_id, change in changes.items():
+        if change:
+            update_jobs_amount(category_id, change)
+    for job in created + updated:
+        job._saved_category_id = job.category_id
+
+
+@receiver(bulk_deleted, sender=Job)
+def count_bulk_deleted_jobs(sender, deleted: list[Job], **kwargs):
+    removed: dict[int, int] = {}
+    for job in deleted:
+        removed[job.category_id] = removed.get(job.category_id, 0) + 1
+    if removed:
+        decrease_jobs_amount(removed)
+
+
+@receiver(post_save, sender=Job)
+def index_saved_job(sender, instance: Job, raw: bool = False, **kwargs):
+    if not raw:
+        search.index_job(instance.id, instance.title, instance.description)
+
+
+@receiver(bulk_saved, sender=Job)
+def index_bulk_saved_jobs(sender, created: list[Job], updated: list[Job], **kwargs):
+    search.index_jobs((job.id, job.title, job.description) for job in created + updated)
+
+
+@receiver(post_delete, sender=Job)
+def unindex_deleted_job(sender, instance: Job, **kwargs):
+    search.unindex_job(instance.id)
+
+
+@receiver(bulk_deleted, sender=Job)
+def unindex_bulk_deleted_jobs(sender, deleted: list[Job], **kwargs):
+    search.unindex_jobs(job.id for job in deleted)
+
+
+@receiver(pre_migrate)
+def stash_legacy_applications(sender, app_config, using, **kwargs):
+    if app_config.label != "jobs":
+        return
+    connection = connections[using]
+    tables = connection.introspection.table_names()
+    if (
+        legacy_applications_table in tables
+        and stashed_applications_table not in tables
+        and Application._meta.db_table not in tables
+    ):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {stashed_applications_table} AS "
+                f"SELECT customuser_id AS user_id, job_id "
+                f"FROM {legacy_applications_table}"
+            )
+
+
+@receiver(post_migrate)
+def restore_legacy_applications(sender, app_config, using, **kwargs):
+    if app_config.label != "jobs":
+        return
+    connection = connections[using]
+    tables = connection.introspection.table_names()
+    if stashed_applications_table in tables and Application._meta.db_table in tables:
+        applied_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {Application._meta.db_table} "
+                f"(user_id, job_id, status, applied_at) "
+                f"SELECT s.user_id, s.job_id, %s, %s "
+                f"FROM {stashed_applications_table} s "
+                f"WHERE s.user_id IN (SELECT id FROM users_customuser) "
+                f"AND s.job_id IN (SELECT id FROM jobs_job) "
+                f"AND NOT EXISTS (SELECT 1 FROM {Application._meta.db_table} a "
+                f"WHERE a.user_id = s.user_id AND a.job_id = s.job_id)",
+                ["Pending", applied_at],
+            )
+            cursor.execute(f"DROP TABLE {stashed_applications_table}")
+
+
+@receiver(pre_migrate)
+def detect_outdated_jobs_amount(sender, app_config, using, **kwargs):
+    if app_config.label != "jobs":
+        return
+    connection = connections[using]
+    table = JobCategory._meta.db_table
+    with connection.cursor() as cursor:
+        if table not in connection.introspection.table_names(cursor):
+            return
+        columns = connection.introspection.get_table_description(cursor, table)
+    if "jobs_amount" not in {column.name for column in columns}:
+        outdated_jobs_amount.add(using)
+
+
+@receiver(post_migrate)
+def recount_outdated_jobs_amount(sender, app_config, using, **kwargs):
+    if app_config.label != "jobs" or using not in outdated_jobs_amount:
+        return
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        columns = connection.introspection.get_table_description(
+            cursor, JobCategory._meta.db_table
+        )
+    if "jobs_amount" in {column.name for column in columns}:
+        JobCategory.rebuild_jobs_amount(using)
+        outdated_jobs_amount.discard(using)
+
+
+@receiver(post_migrate)
+def create_search_index(sender, app_config, **kwargs):
+    if app_config.label == "jobs" and search.create_search_index():
+        # Jobs from before the index existed
+        search.rebuild_search_index()
@@ -0,0 +1,111 @@
+"""Password hashing in a dedicated process pool.
+
+PBKDF2 is deliberately slow and holds the GIL while it runs. Hashing in
+other processes keeps login bursts from stalling the rest of the API.
+"""
+
+import os
+import asyncio
+import threading
+from typing import TYPE_CHECKING
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.contrib.auth import hashers
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+
+class HashingBusy(Exception):
+    """Raised when too many hashing jobs are already waiting"""
+
+
+def init_worker(settings_module: str):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup()
+
+
+class HashingPool:
+    """Process pool with a bound on queued and running jobs"""
+
+    def __init__(self, workers: int, queue: int):
+        self.workers = workers
+        self.queue = queue
+        self.pending = 0
+        self._executor: "ProcessPoolExecutor" = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> "ProcessPoolExecutor":
+        if self._executor is None:
+            # Deferred as the pool is only needed once someone logs in
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=init_worker,
+                        initargs=(os.environ["DJANGO_SETTINGS_MODULE"],),
+                    )
+        return self._executor
+
+    def _done(self, future: Future):
+        with self._lock:
+            self.pending -= 1
+
+    def _replace(self, broken: "ProcessPoolExecutor"):
+        """Drops a pool whose worker died so the next job starts a new one"""
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False)
+
+    def submit(self, func, *args, bounded: bool = True) -> Future:
+        with self._lock:
+            if bounded and self.pending >= self.workers + self.queue:
+                raise HashingBusy()
+            self.pending += 1
+        try:
+            executor = self.executor
+            try:
+                future = executor.submit(func, *args)
+            except BrokenProcessPool:
+                self._replace(executor)
+                future = self.executor.submit(func, *args)
+        except Exception:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, func, *args, bounded: bool = True):
+        """Runs func in the pool and waits for it, retrying once on a new
+        pool if a worker died while it ran"""
+        try:
+            return self.submit(func, *args, bounded=bounded).result()
+        except BrokenProcessPool:
+            return self.submit(func, *args, bounded=bounded).result()
+
+    async def arun(self, func, *args, bounded: bool = True):
+        """Async `run`"""
+        try:
+            return await asyncio.wrap_future(self.submit(func, *args, bounded=bounded))
+        except BrokenProcessPool:
+            return await asyncio.wrap_future(self.submit(func, *args, bounded=bounded))
+
+
+hashing_pool = HashingPool(
+    workers=settings.PASSWORD_HASHING_WORKERS,
+    queue=settings.PASSWORD_HASHING_QUEUE,
+)
+
+
+async def acheck_password(password: str, encoded: str) -> bool:
+    """Verifies password in the hashing pool. Raises `HashingBusy` when full"""
+    return await hashing_pool.arun(hashers.check_password, password, encoded)
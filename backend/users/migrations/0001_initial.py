@@ -0,0 +1,244 @@
+# Generated by Django 5.1.5 on 2026-10-18 21:18
+
+import django.contrib.auth.models
+import django.contrib.auth.validators
+import django.core.validators
+import django.utils.timezone
+import users.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CustomUser",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "last_login",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="last login"
+                    ),
+                ),
+                (
+                    "is_superuser",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Designates that this user has all permissions without explicitly assigning them.",
+                        verbose_name="superuser status",
+                    ),
+                ),
+                (
+                    "username",
+                    models.CharField(
+                        error_messages={
+                            "unique": "A user with that username already exists."
+                        },
+                        help_text="Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.",
+                        max_length=150,
+                        unique=True,
+                        validators=[
+                            django.contrib.auth.validators.UnicodeUsernameValidator()
+                        ],
+                        verbose_name="username",
+                    ),
+                ),
+                (
+                    "first_name",
+                    models.CharField(
+                        blank=True, max_length=150, verbose_name="first name"
+                    ),
+                ),
+                (
+                    "last_name",
+                    models.CharField(
+                        blank=True, max_length=150, verbose_name="last name"
+                    ),
+                ),
+                (
+                    "is_staff",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Designates whether the user can log into this admin site.",
+                        verbose_name="staff status",
+                    ),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        default=True,
+                        help_text="Designates whether this user should be treated as active. Unselect this instead of deleting accounts.",
+                        verbose_name="active",
+                    ),
+                ),
+                (
+                    "date_joined",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="date joined"
+                    ),
+                ),
+                (
+                    "email",
+                    models.EmailField(
+                        max_length=254, unique=True, verbose_name="email address"
+                    ),
+                ),
+                ("password", models.CharField(max_length=88, verbose_name="password")),
+                (
+                    "dob",
+                    models.DateField(
+                        blank=True,
+                        help_text="Date of birth",
+                        null=True,
+                        verbose_name="Date of birth",
+                    ),
+                ),
+                (
+                    "gender",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("Male", "Male"),
+                            ("Female", "Female"),
+                            ("Other", "Other"),
+                        ],
+                        default="Other",
+                        help_text="Can either be F/M/O",
+                        max_length=10,
+                        verbose_name="gender",
+                    ),
+                ),
+                (
+                    "category",
+                    models.CharField(
+                        choices=[
+                            ("Organization", "Organization"),
+                            ("Individual", "Individual"),
+                        ],
+                        help_text="Can either be an Individual or Organization",
+                        max_length=30,
+                        verbose_name="category",
+                    ),
+                ),
+                (
+                    "description",
+                    models.TextField(
+                        blank=True,
+                        help_text="Information about user in details.",
+                        null=True,
+                        verbose_name="description",
+                    ),
+                ),
+                (
+                    "location",
+                    models.CharField(
+                        help_text="User's place of residence or office",
+                        max_length=50,
+                        verbose_name="location",
+                    ),
+                ),
+                (
+                    "phone_number",
+                    models.CharField(
+                        blank=True,
+                        help_text="Active telephone number",
+                        max_length=15,
+                        null=True,
+                        validators=[
+                            django.core.validators.RegexValidator(
+                                "\\+\\d{12,13}|\\d{10,11}",
+                                "Enter a valid phone number. This phone number may start with '+COUNTRY-CODE'",
+                            )
+                        ],
+                        verbose_name="phone number",
+                    ),
+                ),
+                (
+                    "documents",
+                    models.FileField(
+                        blank=True,
+                        help_text="Individual's resume or company's Certificate of Existence (pdf)",
+                        null=True,
+                        upload_to=users.models.generate_document_filepath,
+                        validators=[
+                            django.core.validators.FileExtensionValidator(
+                                allowed_extensions=["pdf"]
+                            )
+                        ],
+                        verbose_name="documents",
+                    ),
+                ),
+                (
+                    "profile",
+                    models.ImageField(
+                        blank=True,
+                        default="default/user_avatar.png",
+                        null=True,
+                        upload_to=users.models.generate_profile_filepath,
+                        validators=[
+                            django.core.validators.FileExtensionValidator(
+                                allowed_extensions=["jpg", "jpeg", "png"]
+                            )
+                        ],
+                        verbose_name="Profile Picture",
+                    ),
+                ),
+                (
+                    "token",
+                    models.CharField(
+                        blank=True,
+                        help_text="Token for validation",
+                        max_length=40,
+                        null=True,
+                        unique=True,
+                        verbose_name="token",
+                    ),
+                ),
+                (
+                    "groups",
+                    models.ManyToManyField(
+                        blank=True,
+                        help_text="The groups this user belongs to. A user will get all permissions granted to each of their groups.",
+                        related_name="user_set",
+                        related_query_name="user",
+                        to="auth.group",
+                        verbose_name="groups",
+                    ),
+                ),
+                (
+                    "user_permissions",
+                    models.ManyToManyField(
+                        blank=True,
+                        help_text="Specific permissions for this user.",
+                        related_name="user_set",
+                        related_query_name="user",
+                        to="auth.permission",
+                        verbose_name="user permissions",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "user",
+                "verbose_name_plural": "users",
+                "abstract": False,
+            },
+            managers=[
+                ("objects", django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
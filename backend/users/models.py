@@ -113,14 +113,6 @@ class CustomUser(AbstractUser):
         null=True,
     )
 
-    jobs_applied = models.ManyToManyField(
-        "jobs.Job",
-        verbose_name=_("Jobs Applied"),
-        help_text=_("Jobs that the user has applied for"),
-        related_name="applicants",
-        blank=True,
-    )
-
     token = models.CharField(
         _("token"),
         help_text=_("Token for validation"),
@@ -139,5 +131,7 @@ class CustomUser(AbstractUser):
 
     def save(self, *args, **kwargs):
         if len(self.password) != 88:
+            # Hashed inline, the bounded pool is for request paths handling
+            # `HashingBusy`
             self.set_password(self.password)
         super().save(*args, **kwargs)
@@ -0,0 +1,99 @@
+"""Fixed-size variants of `CustomUser.profile` images.
+
+Variants are stored next to the original e.g `user_profile/1abc.jpg` gets
+`user_profile/1abc.128.webp`, except those of the shared `default/` images
+which go to `THUMBNAIL_CACHE_DIR`. They are made on first request by the
+media mount in `api` or ahead of time with `python -m api make-thumbnails`.
+"""
+
+import os
+import uuid
+from pathlib import Path
+from typing import Iterable, Literal
+from django.conf import settings
+
+ThumbnailFormat = Literal["webp", "jpeg"]
+
+thumbnail_formats: tuple[ThumbnailFormat, ...] = ("webp", "jpeg")
+
+thumbnail_media_types = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+thumbnail_quality = 80
+
+image_extensions = (".jpg", ".jpeg", ".png")
+
+
+def is_image(path: str | Path) -> bool:
+    return os.path.splitext(path)[1].lower() in image_extensions
+
+
+def thumbnail_path(original: str | Path, size: int, format: ThumbnailFormat) -> Path:
+    """Path of the `size` pixels variant of `original`"""
+    original = Path(original)
+    extension = "jpg" if format == "jpeg" else format
+    name = f"{original.stem}.{size}.{extension}"
+    default_root = Path(settings.MEDIA_ROOT, "default").resolve()
+    resolved = original.resolve()
+    if resolved.is_relative_to(default_root):
+        relative = resolved.relative_to(default_root).with_name(name)
+        return Path(settings.THUMBNAIL_CACHE_DIR, relative)
+    return original.with_name(name)
+
+
+def make_thumbnail(original: str | Path, size: int, format: ThumbnailFormat) -> Path:
+    """Renders a variant fitting in a `size` pixels square unless it exists"""
+    target = thumbnail_path(original, size, format)
+    if target.exists():
+        return target
+    # Pillow is only loaded once a variant is actually rendered
+    from PIL import Image, ImageOps
+
+    with Image.open(original) as image:
+        # Lets JPEG decode at a reduced scale instead of full resolution
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+        mode = "RGB"
+        if format == "webp" and (
+            "A" in image.getbands() or "transparency" in image.info
+        ):
+            mode = "RGBA"
+        if image.mode != mode:
+            image = image.convert(mode)
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Concurrent renders of the same variant each write their own file
+        partial = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+        try:
+            image.save(partial, format=format, quality=thumbnail_quality)
+            os.replace(partial, target)
+        finally:
+            partial.unlink(missing_ok=True)
+    return target
+
+
+def make_thumbnails(original: str | Path) -> int:
+    """Renders every size and format of `original`. Returns variants made"""
+    made = 0
+    for size in settings.PROFILE_THUMBNAIL_SIZES:
+        for format in thumbnail_formats:
+            if not thumbnail_path(original, size, format).exists():
+                make_thumbnail(original, size, format)
+                made += 1
+    return made
+
+
+def backfill_thumbnails(profiles: Iterable[str], workers: int) -> int:
+    """Renders missing variants of `profiles` relative to `MEDIA_ROOT`
+    across `workers` processes"""
+    originals = [
+        Path(settings.MEDIA_ROOT) / profile
+        for profile in profiles
+        if profile and is_image(profile)
+    ]
+    originals = [original for original in originals if original.is_file()]
+    if workers == 1:
+        return sum(map(make_thumbnails, originals))
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(make_thumbnails, originals, chunksize=16))